@@ -0,0 +1,520 @@
+import random
+import tracemalloc
+from math import inf
+from time import perf_counter
+from typing import Callable, Optional
+
+import generic_search
+import grid_search
+import indexed_search
+import maze as maze_module
+from generic_search import Node, PriorityQueue, SearchStats, node_to_path
+from grid_search import DIAGONAL, DistanceField
+from maze import Maze, MazeLocation, manhattan_distance
+from missionaries import MAX_NUM, MCState
+
+
+def measure(search: Callable[[], Optional[Node]]) -> tuple[float, float, int]:
+    """Seconds, then peak MiB in a second run under tracemalloc, and hops."""
+    start: float = perf_counter()
+    node: Optional[Node] = search()
+    elapsed: float = perf_counter() - start
+    tracemalloc.start()
+    search()
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, -1 if node is None else len(node_to_path(node)) - 1
+
+
+def indexed_table(sizes: tuple[int, ...] = (1000, 5000), max_python: int = 1000):
+    """bfs corner to corner with Node objects and with integer ids."""
+    print(f"{'maze':<14}{'engine':<14}{'seconds':>10}{'peak MiB':>10}{'hops':>8}")
+    for size in sizes:
+        random.seed(0)
+        maze: Maze = Maze(
+            size, size, MazeLocation(0, 0), MazeLocation(size - 1, size - 1)
+        )
+        goal: int = maze.index(maze.goal)
+        engines: list[tuple[str, Callable[[], Optional[Node]]]] = []
+        if size <= max_python:
+            engines.append(
+                (
+                    "generic",
+                    lambda: generic_search.bfs(
+                        maze.start, maze.goal_test, maze.successors
+                    ),
+                )
+            )
+            engines.append(
+                (
+                    "ids, array",
+                    lambda: indexed_search.bfs(
+                        maze, maze.start, lambda idx: idx == goal, vectorize=False
+                    ),
+                )
+            )
+        if indexed_search.np is not None:
+            engines.append(
+                (
+                    "ids, numpy",
+                    lambda: indexed_search.bfs(
+                        maze, maze.start, lambda idx: idx == goal
+                    ),
+                )
+            )
+        for name, search in engines:
+            seconds, peak, hops = measure(search)
+            print(
+                f"{f'{size}x{size}':<14}{name:<14}{seconds:>10.2f}{peak:>10.1f}"
+                f"{hops:>8}"
+            )
+
+
+class HeapCounter:
+    """Counts heap pushes and pops and the Node.__lt__ calls the heap makes,
+    patched into generic_search within a with block."""
+
+    def __init__(self) -> None:
+        self.pushes: int = 0
+        self.pops: int = 0
+        self.node_comparisons: int = 0
+
+    def __enter__(self) -> "HeapCounter":
+        push, pop, less = generic_search.heappush, generic_search.heappop, Node.__lt__
+        self._saved = push, pop, less
+
+        def counted_push(heap: list, item) -> None:
+            self.pushes += 1
+            push(heap, item)
+
+        def counted_pop(heap: list):
+            self.pops += 1
+            return pop(heap)
+
+        def counted_less(node: Node, other: Node) -> bool:
+            self.node_comparisons += 1
+            return less(node, other)
+
+        generic_search.heappush, generic_search.heappop = counted_push, counted_pop
+        Node.__lt__ = counted_less
+        return self
+
+    def __exit__(self, *exc) -> None:
+        generic_search.heappush, generic_search.heappop, Node.__lt__ = self._saved
+
+
+def node_heap_astar(
+    initial, goal_test, successors, heuristic, stats: Optional[SearchStats]
+) -> Optional[Node]:
+    """astar as it was before heap tuples and stale skipping, with weights:
+    Node.__lt__ orders the heap and every popped node is expanded, stale
+    ones included."""
+    frontier: PriorityQueue[Node] = PriorityQueue()
+    frontier.push(Node(initial, None, 0.0, heuristic(initial)))
+    explored: dict = {initial: 0.0}
+    while not frontier.empty:
+        node: Node = frontier.pop()
+        if stats is not None and explored[node.state] < node.cost:
+            stats.stale += 1
+        if goal_test(node.state):
+            return node
+        for child, step in successors(node.state):
+            new_cost: float = node.cost + step
+            if child not in explored or explored[child] > new_cost:
+                explored[child] = new_cost
+                frontier.push(Node(child, node, new_cost, heuristic(child)))
+    return None
+
+
+def weighted_table(size: int = 300, terrain: int = 9, seeds: int = 3) -> None:
+    """Heap work of A* and Dijkstra on mazes whose cells cost 1 to terrain."""
+    print(
+        f"{'search':<18}{'pushes':>9}{'pops':>9}{'stale':>8}"
+        f"{'Node.__lt__':>13}{'seconds':>9}{'cost':>7}"
+    )
+    for seed in range(seeds):
+        random.seed(seed)
+        maze: Maze = Maze(
+            size,
+            size,
+            MazeLocation(0, 0),
+            MazeLocation(size - 1, size - 1),
+            terrain=terrain,
+        )
+        distance = manhattan_distance(maze.goal)
+        searches: list[tuple[str, Callable[[SearchStats], Optional[Node]]]] = [
+            (
+                "node heap (old)",
+                lambda stats: node_heap_astar(
+                    maze.start,
+                    maze.goal_test,
+                    maze.weighted_successors,
+                    distance,
+                    stats,
+                ),
+            ),
+            (
+                "astar",
+                lambda stats: generic_search.astar(
+                    maze.start,
+                    maze.goal_test,
+                    maze.weighted_successors,
+                    distance,
+                    stats,
+                    weighted=True,
+                ),
+            ),
+            (
+                "dijkstra",
+                lambda stats: generic_search.dijkstra(
+                    maze.start,
+                    maze.goal_test,
+                    maze.weighted_successors,
+                    stats,
+                    weighted=True,
+                ),
+            ),
+        ]
+        print(f"seed {seed}")
+        for name, search in searches:
+            times: list[float] = []
+            for _ in range(3):
+                start: float = perf_counter()
+                node: Optional[Node] = search(None)
+                times.append(perf_counter() - start)
+            elapsed: float = min(times)
+            stats: SearchStats = SearchStats()
+            with HeapCounter() as heap:
+                search(stats)
+            cost: float = -1 if node is None else node.cost
+            print(
+                f"{name:<18}{heap.pushes:>9}{heap.pops:>9}{stats.stale:>8}"
+                f"{heap.node_comparisons:>13}{elapsed:>9.3f}{cost:>7.0f}"
+            )
+
+
+def bidirectional_table(sizes: tuple[int, ...] = (100, 300, 1000)) -> None:
+    """Expanded nodes and time of one- and two-ended searches."""
+    print(
+        f"{'problem':<16}{'search':<16}{'expanded':>10}{'seconds':>9}{'hops':>6}"
+        f"{'speedup':>9}"
+    )
+    problems: list[tuple[str, dict[str, Callable[[SearchStats], Optional[Node]]]]]
+    problems = []
+    for size in sizes:
+        random.seed(0)
+        # endpoints away from the walls, where the frontiers are whole rings
+        a, b = size // 4, 3 * size // 4
+        maze: Maze = Maze(size, size, MazeLocation(a, a), MazeLocation(b, b))
+        to_goal = manhattan_distance(maze.goal)
+        to_start = manhattan_distance(maze.start)
+        problems.append(
+            (
+                f"{size}x{size} maze",
+                {
+                    "bfs": lambda stats, m=maze: generic_search.bfs(
+                        m.start, m.goal_test, m.successors, stats
+                    ),
+                    "bidir. bfs": lambda stats, m=maze: generic_search.bidirectional_bfs(
+                        m.start, m.goal, m.successors, stats=stats
+                    ),
+                    "astar": lambda stats, m=maze, h=to_goal: generic_search.astar(
+                        m.start, m.goal_test, m.successors, h, stats
+                    ),
+                    "bidir. astar": lambda stats, m=maze, h=to_goal, r=to_start: (
+                        generic_search.bidirectional_astar(
+                            m.start, m.goal, m.successors, h, r, stats=stats
+                        )
+                    ),
+                },
+            )
+        )
+    start: MCState = MCState(MAX_NUM, MAX_NUM, True)
+    goal: MCState = MCState(0, 0, False)
+    problems.append(
+        (
+            "missionaries",
+            {
+                "bfs": lambda stats: generic_search.bfs(
+                    start, MCState.goal_test, MCState.successors, stats
+                ),
+                "bidir. bfs": lambda stats: generic_search.bidirectional_bfs(
+                    start, goal, MCState.successors, stats=stats
+                ),
+            },
+        )
+    )
+    for name, searches in problems:
+        baseline: float = 0.0
+        for label, search in searches.items():
+            stats: SearchStats = SearchStats()
+            node: Optional[Node] = search(stats)
+            hops: int = -1 if node is None else len(node_to_path(node)) - 1
+            if not label.startswith("bidir."):
+                baseline = stats.seconds
+            print(
+                f"{name:<16}{label:<16}{stats.expanded:>10}{stats.seconds:>9.3f}"
+                f"{hops:>6}{baseline / stats.seconds:>8.1f}x"
+            )
+
+
+def crossings_check(
+    problems: tuple[tuple[int, int], ...] = (
+        (1, 1), (3, 1), (3, 2), (5, 3), (10, 4), (20, 5)
+    )
+) -> None:
+    """MCState.crossings_left is 0 on the goals and never above the exact
+    crossings left, found by bfs backwards from the goals."""
+    for n, capacity in problems:
+        states: list[MCState] = [
+            MCState(m, c, boat, n, capacity)
+            for m in range(n + 1)
+            for c in range(n + 1)
+            for boat in (True, False)
+        ]
+        states = [state for state in states if state.is_legal]
+        predecessors: dict[MCState, list[MCState]] = {state: [] for state in states}
+        for state in states:
+            for child in state.successors():
+                predecessors[child].append(state)
+        goals: list[MCState] = [state for state in states if state.goal_test()]
+        assert all(goal.crossings_left() == 0 for goal in goals)
+        # states that cannot reach a goal still need an estimate
+        assert all(state.crossings_left() >= 0 for state in states)
+        crossings: dict[MCState, int] = {goal: 0 for goal in goals}
+        level: list[MCState] = goals
+        while level:
+            following: list[MCState] = []
+            for state in level:
+                for parent in predecessors[state]:
+                    if parent not in crossings:
+                        crossings[parent] = crossings[state] + 1
+                        following.append(parent)
+            level = following
+        assert all(
+            state.crossings_left() <= steps for state, steps in crossings.items()
+        )
+        print(
+            f"missionaries {n}, boat {capacity}: crossings_left admissible on "
+            f"{len(crossings)} states"
+        )
+
+
+def memory_table(
+    mazes: tuple[int, ...] = (300, 1000), missionaries: tuple[int, ...] = (10, 100)
+) -> None:
+    """Peak memory of astar and of the memory-bounded searches."""
+    print(
+        f"{'problem':<26}{'search':<18}{'expanded':>10}{'seconds':>9}"
+        f"{'peak KiB':>10}{'cost':>7}"
+    )
+    problems: list[tuple[str, dict[str, Callable[[SearchStats], Optional[Node]]]]]
+    problems = []
+    for size in (30,) + mazes:
+        random.seed(0)
+        maze: Maze = Maze(
+            size, size, MazeLocation(0, 0), MazeLocation(size - 1, size - 1)
+        )
+        args = (maze.start, maze.goal_test, maze.successors)
+        h = manhattan_distance(maze.goal)
+        searches: dict[str, Callable[[SearchStats], Optional[Node]]] = {
+            "astar": lambda stats, args=args, h=h: generic_search.astar(
+                *args, h, stats
+            ),
+            "ida_star": lambda stats, args=args, h=h: generic_search.ida_star(
+                *args, h, stats
+            ),
+            "beam_search, 50": lambda stats, args=args, h=h: (
+                generic_search.beam_search(*args, h, 50, stats)
+            ),
+        }
+        if size <= 30:  # iddfs searches every level again
+            searches = {
+                "bfs": lambda stats, args=args: generic_search.bfs(*args, stats),
+                "iddfs": lambda stats, args=args: generic_search.iddfs(*args, stats),
+            }
+        problems.append((f"{size}x{size} maze", searches))
+    for n in missionaries:
+        start: MCState = MCState(n, n, True, n, 4)
+        args = (start, MCState.goal_test, MCState.successors)
+        h = MCState.crossings_left
+        searches = {
+            "astar": lambda stats, args=args: generic_search.astar(*args, h, stats),
+            "ida_star": lambda stats, args=args: generic_search.ida_star(
+                *args, h, stats
+            ),
+            "beam_search, 10": lambda stats, args=args: (
+                generic_search.beam_search(*args, h, 10, stats)
+            ),
+        }
+        if n <= 10:
+            searches["iddfs"] = lambda stats, args=args: generic_search.iddfs(
+                *args, stats
+            )
+        problems.append((f"missionaries {n}, boat 4", searches))
+    for name, searches in problems:
+        for label, search in searches.items():
+            stats: SearchStats = SearchStats()
+            node: Optional[Node] = search(stats)
+            traced: SearchStats = SearchStats(trace_memory=True)
+            search(traced)
+            cost: float = -1 if node is None else node.cost
+            print(
+                f"{name:<26}{label:<18}{stats.expanded:>10}{stats.seconds:>9.3f}"
+                f"{traced.peak_memory / 1024:>10.0f}{cost:>7.0f}"
+            )
+
+
+def octile_successors(maze: Maze) -> Callable[[MazeLocation], list]:
+    """Weighted successors with the diagonal moves jps(diagonal=True) takes."""
+
+    def successors(ml: MazeLocation) -> list[tuple[MazeLocation, float]]:
+        edges: list = [(location, 1.0) for location in maze.successors(ml)]
+        for dr in (1, -1):
+            for dc in (1, -1):
+                r, c = ml.row + dr, ml.column + dc
+                if (
+                    0 <= r < maze.rows
+                    and 0 <= c < maze.columns
+                    and maze._cells[r * maze.columns + c]
+                    and maze._cells[ml.row * maze.columns + c]
+                    and maze._cells[r * maze.columns + ml.column]
+                ):
+                    edges.append((MazeLocation(r, c), DIAGONAL))
+        return edges
+
+    return successors
+
+
+def octile_distance(goal: MazeLocation) -> Callable[[MazeLocation], float]:
+    def distance(ml: MazeLocation) -> float:
+        dr, dc = abs(ml.row - goal.row), abs(ml.column - goal.column)
+        return max(dr, dc) + (DIAGONAL - 1) * min(dr, dc)
+
+    return distance
+
+
+def grid_table(
+    size: int = 2000,
+    sparseness: tuple[float, ...] = (0.0, 0.1, 0.2, 0.3),
+    queries: int = 100,
+) -> None:
+    """Corner to corner astar and jps, and a distance field to the goal
+    answering `queries` random starts, whose mean time is shown."""
+    print(
+        f"{'sparseness':<14}{'search':<22}{'expanded':>10}{'seconds':>9}"
+        f"{'peak MiB':>10}{'cost':>9}"
+    )
+    for blocked in sparseness:
+        seed: int = 0
+        while True:  # the first maze whose corners are connected
+            random.seed(seed)
+            maze: Maze = Maze(
+                size,
+                size,
+                MazeLocation(0, 0),
+                MazeLocation(size - 1, size - 1),
+                blocked,
+            )
+            started: float = perf_counter()
+            field: DistanceField = DistanceField(maze)
+            building: float = perf_counter() - started
+            if field.distance(maze.start) < inf:
+                break
+            seed += 1
+        to_goal = manhattan_distance(maze.goal)
+        searches: dict[str, Callable[[SearchStats], Optional[Node]]] = {
+            "astar": lambda stats: generic_search.astar(
+                maze.start, maze.goal_test, maze.successors, to_goal, stats
+            ),
+            "jps": lambda stats: grid_search.jps(maze, maze.start, maze.goal, stats),
+            "astar, diagonal": lambda stats: generic_search.astar(
+                maze.start,
+                maze.goal_test,
+                octile_successors(maze),
+                octile_distance(maze.goal),
+                stats,
+                weighted=True,
+            ),
+            "jps, diagonal": lambda stats: grid_search.jps(
+                maze, maze.start, maze.goal, stats, diagonal=True
+            ),
+        }
+        name: str = f"{blocked} (seed {seed})"
+        for label, search in searches.items():
+            stats: SearchStats = SearchStats()
+            node: Optional[Node] = search(stats)
+            traced: SearchStats = SearchStats(trace_memory=True)
+            search(traced)
+            cost: float = -1 if node is None else node.cost
+            print(
+                f"{name:<14}{label:<22}{stats.expanded:>10}{stats.seconds:>9.3f}"
+                f"{traced.peak_memory / 2**20:>10.1f}{cost:>9.1f}"
+            )
+        print(f"{name:<14}{'distance field':<22}{'':>10}{building:>9.3f}")
+        starts: list[MazeLocation] = []
+        while len(starts) < queries:
+            ml = MazeLocation(random.randrange(size), random.randrange(size))
+            if field.distance(ml) < inf:
+                starts.append(ml)
+        stats = SearchStats()
+        for ml in starts:
+            field.path(ml, stats)
+        print(
+            f"{name:<14}{'field query (mean)':<22}{stats.expanded // queries:>10}"
+            f"{stats.seconds / queries:>9.4f}"
+        )
+
+
+def maze_table(sizes: tuple[int, ...] = (1000, 2000, 10000), max_python: int = 2000):
+    """Building, drawing and marking a diagonal path in mazes stored through
+    NumPy and, up to max_python, without it."""
+    print(
+        f"{'maze':<14}{'engine':<10}{'build s':>9}{'kept MiB':>10}{'peak MiB':>10}"
+        f"{'str s':>8}{'mark s':>9}"
+    )
+    numpy = maze_module.np
+    for size in sizes:
+        for name, module in (("numpy", numpy), ("python", None)):
+            if module is None and size > max_python:
+                continue
+            maze_module.np = module
+            random.seed(0)
+            tracemalloc.start()
+            start: float = perf_counter()
+            maze: Maze = Maze(
+                size, size, MazeLocation(0, 0), MazeLocation(size - 1, size - 1)
+            )
+            building: float = perf_counter() - start
+            kept, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            start = perf_counter()
+            str(maze)
+            drawing: float = perf_counter() - start
+            path: list[MazeLocation] = [MazeLocation(i, i) for i in range(size)]
+            start = perf_counter()
+            maze.mark(path)
+            assert maze.paths == size - 2
+            maze.clear(path)
+            marking: float = perf_counter() - start
+            print(
+                f"{f'{size}x{size}':<14}{name:<10}{building:>9.2f}"
+                f"{kept / 2**20:>10.1f}{peak / 2**20:>10.1f}{drawing:>8.2f}"
+                f"{marking:>9.4f}"
+            )
+    maze_module.np = numpy
+
+
+if __name__ == "__main__":
+    maze_table()
+    print()
+    indexed_table()
+    print()
+    weighted_table()
+    print()
+    bidirectional_table()
+    print()
+    crossings_check()
+    memory_table()
+    print()
+    grid_table()
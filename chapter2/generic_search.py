@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import json
+import tracemalloc
 from collections import deque
-from dataclasses import dataclass
-from heapq import heappop, heappush
-from math import exp
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from functools import wraps
+from heapq import heappop, heappush, nsmallest
+from math import exp, inf
 from random import paretovariate
+from time import monotonic, perf_counter
 from typing import (
     Any,
     Callable,
     Generic,
     Iterable,
+    Iterator,
     Optional,
     Protocol,
     Sequence,
@@ -18,6 +24,7 @@ from typing import (
 )
 
 T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
 
 
 def linear_contains(iterable: Iterable[T], key: T) -> bool:
@@ -75,6 +82,9 @@ class Stack(Generic[T]):
     def __repr__(self) -> str:
         return repr(self._container)
 
+    def __len__(self) -> int:
+        return len(self._container)
+
 
 @dataclass
 class Node(Generic[T]):
@@ -87,9 +97,159 @@ class Node(Generic[T]):
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
 
+@dataclass
+class SearchStats:
+    """How much of the state space a search touched: nodes expanded and
+    generated, the largest frontier, time and, on request, memory.
+
+    The hooks are called with every expanded node and every goal node found;
+    searches called without stats skip all the bookkeeping. With trace_memory
+    the search runs under tracemalloc, which slows it down, and peak_memory
+    gets the most bytes it had allocated at once; searches decorated with
+    stops_tracing also stop the tracing when they raise.
+    """
+
+    expanded: int = 0  # nodes taken off the frontier and goal-tested
+    generated: int = 0  # children pushed onto the frontier
+    stale: int = 0  # astar heap entries dropped for a cheaper copy
+    max_frontier: int = 0
+    seconds: float = 0.0
+    peak_memory: int = 0
+    trace_memory: bool = field(default=False, repr=False)
+    on_expand: Optional[Callable[[Node], None]] = field(default=None, repr=False)
+    on_goal: Optional[Callable[[Node], None]] = field(default=None, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if not f.name.startswith("on_") and f.name != "trace_memory"
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def begin(self) -> float:
+        if self.trace_memory:
+            # set while tracemalloc runs because of this search
+            self._started_tracing: bool = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline: int = tracemalloc.get_traced_memory()[0]
+        return perf_counter()
+
+    def expand(self, node: Node, frontier: int) -> None:
+        self.expanded += 1
+        if frontier >= self.max_frontier:
+            self.max_frontier = frontier + 1
+        if self.on_expand is not None:
+            self.on_expand(node)
+
+    def finish(self, started: float, generated: int, node: Optional[Node]) -> None:
+        self.generated += generated
+        self.seconds += perf_counter() - started
+        if self.trace_memory:
+            peak: int = tracemalloc.get_traced_memory()[1] - self._baseline
+            self.peak_memory = max(self.peak_memory, peak)
+            self.stop_tracing()
+        if node is not None and self.on_goal is not None:
+            self.on_goal(node)
+
+    def stop_tracing(self) -> None:
+        """Stop the tracing begin() started, also for a search that raised."""
+        if getattr(self, "_started_tracing", False):
+            self._started_tracing = False
+            tracemalloc.stop()
+
+
+def stops_tracing(search: F) -> F:
+    """Decorates a search taking SearchStats so that an exception raised by
+    its goal test, successors or heuristic does not leave tracemalloc on."""
+
+    @wraps(search)
+    def guarded(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return search(*args, **kwargs)
+        except BaseException:
+            for arg in (*args, *kwargs.values()):
+                if isinstance(arg, SearchStats):
+                    arg.stop_tracing()
+            raise
+
+    return guarded  # type: ignore[return-value]
+
+
+class Status(str, Enum):
+    FINISHED = "finished"
+    NODE_LIMIT = "node limit"
+    TIMED_OUT = "timed out"
+    CANCELLED = "cancelled"
+
+
+class Token(Protocol):
+    """Polled by Budget.spend() once per expanded node; a threading.Event
+    set from another thread stops the search at its next expansion."""
+
+    def is_set(self) -> bool:
+        ...
+
+
+@dataclass
+class Budget:
+    """Caps on the nodes a search expands, on its time and a cancel token.
+
+    A search stops after expanding `nodes` nodes, after `seconds`, or once the
+    `cancel` token is set, returns None and leaves NODE_LIMIT, TIMED_OUT or
+    CANCELLED in `status`. `best` is the expanded node
+    that got closest to a goal: the deepest one for dfs and bfs, the one with
+    the lowest heuristic for astar.
+    """
+
+    seconds: Optional[float] = None
+    nodes: Optional[int] = None
+    cancel: Optional[Token] = None
+    status: Status = Status.FINISHED
+    spent: int = 0
+    best: Optional[Node] = None
+    deadline: float = field(default=inf, repr=False)
+    progress: float = field(default=-inf, repr=False)
+
+    def start(self) -> None:
+        self.status = Status.FINISHED
+        self.spent = 0
+        self.best = None
+        self.progress = -inf
+        self.deadline = inf if self.seconds is None else monotonic() + self.seconds
+
+    def spend(self, node: Node, progress: float) -> bool:
+        """Count one expanded node, False once the search should stop."""
+        if self.nodes is not None and self.spent >= self.nodes:
+            self.status = Status.NODE_LIMIT
+        elif self.deadline != inf and monotonic() > self.deadline:
+            self.status = Status.TIMED_OUT
+        elif self.cancel is not None and self.cancel.is_set():
+            self.status = Status.CANCELLED
+        else:
+            self.spent += 1
+            if progress > self.progress:
+                self.progress = progress
+                self.best = node
+            return True
+        return False
+
+
+@stops_tracing
 def dfs(
-    initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], list[T]]
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list[T]],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
 ) -> Optional[Node[T]]:
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
     frontier: Stack[Node[T]] = Stack()
     frontier.push(Node(initial, None))
     explored: set[T] = {initial}
@@ -97,15 +257,24 @@ def dfs(
     while not frontier.empty:
         current_node = frontier.pop()
         current_state = current_node.state
+        if budget is not None and not budget.spend(current_node, current_node.cost):
+            break
+        if stats is not None:
+            stats.expand(current_node, len(frontier))
 
         if goal_test(current_state):
+            if stats is not None:
+                stats.finish(started, len(explored) - 1, current_node)
             return current_node
 
         for child in successors(current_state):
             if child in explored:
                 continue
-            frontier.push(Node(child, current_node))
+            # the cost counts the steps taken, it is the depth of the node
+            frontier.push(Node(child, current_node, current_node.cost + 1))
             explored.add(child)
+    if stats is not None:
+        stats.finish(started, len(explored) - 1, None)
     return None
 
 
@@ -132,13 +301,24 @@ class Queue:
     def empty(self) -> bool:
         return not self._container
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def __repr__(self) -> str:
         return repr(self._container)
 
 
+@stops_tracing
 def bfs(
-    initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], list[T]]
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list[T]],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
 ) -> Optional[Node[T]]:
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
     frontier: Queue[Node[T]] = Queue()
     frontier.push(Node(initial, None))
     explored: set[T] = {initial}
@@ -146,15 +326,24 @@ def bfs(
     while not frontier.empty:
         current_node = frontier.pop()
         current_state = current_node.state
+        if budget is not None and not budget.spend(current_node, current_node.cost):
+            break
+        if stats is not None:
+            stats.expand(current_node, len(frontier))
 
         if goal_test(current_state):
+            if stats is not None:
+                stats.finish(started, len(explored) - 1, current_node)
             return current_node
 
         for child in successors(current_state):
             if child in explored:
                 continue
-            frontier.push(Node(child, current_node))
+            # the cost counts the steps taken, it is the depth of the node
+            frontier.push(Node(child, current_node, current_node.cost + 1))
             explored.add(child)
+    if stats is not None:
+        stats.finish(started, len(explored) - 1, None)
     return None
 
 
@@ -175,32 +364,391 @@ class PriorityQueue(Generic[T]):
     def empty(self) -> bool:
         return not self._container
 
+    def __len__(self) -> int:
+        return len(self._container)
+
 
+@stops_tracing
 def astar(
     initial: T,
     goal_test: Callable[[T], bool],
-    successors: Callable[[T], list[T]],
+    successors: Callable[[T], list],
     heuristic: Callable[[T], float],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    weighted: bool = False,
 ) -> Optional[Node[T]]:
-    frontier: PriorityQueue[Node[T]] = PriorityQueue()
-    frontier.push(Node(initial, None, 0.0, heuristic(initial)))
+    """With weighted=True successors returns (state, step cost) pairs, the
+    costs must not be negative; otherwise every step costs 1."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    h: float = heuristic(initial)
+    # (f, h, push count, node): the heap never compares nodes, and on equal f
+    # the node closer to the goal comes first
+    frontier: list[tuple[float, float, int, Node[T]]] = [
+        (h, h, 0, Node(initial, None, 0.0, h))
+    ]
     explored: dict[T, float] = {initial: 0.0}
+    pushed: int = 0
 
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()  # node minimum cost __lt__
+    while frontier:
+        current_node: Node[T] = heappop(frontier)[3]
         current_state = current_node.state
+        if explored[current_state] < current_node.cost:
+            # a stale entry, the state was pushed again with a lower cost
+            if stats is not None:
+                stats.stale += 1
+            continue
+        if budget is not None and not budget.spend(
+            current_node, -current_node.heuristic
+        ):
+            break
+        if stats is not None:
+            stats.expand(current_node, len(frontier))
 
         if goal_test(current_state):
+            if stats is not None:
+                stats.finish(started, pushed, current_node)
             return current_node
 
-        for child in successors(current_state):
-            new_cost = current_node.cost + 1
+        for edge in successors(current_state):
+            child, step = edge if weighted else (edge, 1)
+            new_cost = current_node.cost + step
             if child not in explored or explored[child] > new_cost:
                 explored[child] = new_cost
-                frontier.push(Node(child, current_node, new_cost, heuristic(child)))
+                h = heuristic(child)
+                pushed += 1
+                heappush(
+                    frontier,
+                    (new_cost + h, h, pushed, Node(child, current_node, new_cost, h)),
+                )
+    if stats is not None:
+        stats.finish(started, pushed, None)
     return None
 
 
+def dijkstra(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    weighted: bool = False,
+) -> Optional[Node[T]]:
+    """Uniform-cost search: astar without a heuristic."""
+    return astar(
+        initial, goal_test, successors, lambda state: 0.0, stats, budget, weighted
+    )
+
+
+def _join(
+    meet: T,
+    parents: tuple[dict[T, Optional[T]], dict[T, Optional[T]]],
+    costs: tuple[dict[T, float], dict[T, float]],
+) -> Node[T]:
+    """The path initial -> meet -> goal of a bidirectional search as nodes."""
+    forward: list[T] = [meet]
+    while parents[0][forward[-1]] is not None:
+        forward.append(parents[0][forward[-1]])
+    backward: list[T] = []
+    state: Optional[T] = parents[1][meet]
+    while state is not None:
+        backward.append(state)
+        state = parents[1][state]
+    total: float = costs[0][meet] + costs[1][meet]
+    node: Optional[Node[T]] = None
+    for state in reversed(forward):
+        node = Node(state, node, costs[0][state])
+    for state in backward:
+        node = Node(state, node, total - costs[1][state])
+    return node
+
+
+@stops_tracing
+def bidirectional_bfs(
+    initial: T,
+    goal: T,
+    successors: Callable[[T], list[T]],
+    predecessors: Optional[Callable[[T], list[T]]] = None,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+) -> Optional[Node[T]]:
+    """bfs from both ends until they meet, a whole level of the smaller
+    frontier at a time. predecessors(state) gives the states with an edge to
+    state; without it the edges are taken to be reversible. Hooks and
+    Budget.best see nodes without parents."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    expand = (successors, successors if predecessors is None else predecessors)
+    parents: tuple[dict[T, Optional[T]], dict[T, Optional[T]]] = (
+        {initial: None},
+        {goal: None},
+    )
+    depths: tuple[dict[T, float], dict[T, float]] = ({initial: 0.0}, {goal: 0.0})
+    frontiers: list[list[T]] = [[initial], [goal]]
+    meet: Optional[T] = initial if initial == goal else None
+    generated: int = 0
+
+    while meet is None and frontiers[0] and frontiers[1]:
+        side: int = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        mine, theirs = depths[side], depths[1 - side]
+        following: list[T] = []
+        best: float = inf
+        for state in frontiers[side]:
+            depth: float = mine[state]
+            if budget is not None and not budget.spend(Node(state, None, depth), depth):
+                break
+            if stats is not None:
+                stats.expand(Node(state, None, depth), len(frontiers[side]))
+            for child in expand[side](state):
+                if child in mine:
+                    continue
+                mine[child] = depth + 1
+                parents[side][child] = state
+                following.append(child)
+                # the whole level is finished first: another meeting point
+                # of the level may give a shorter path
+                if child in theirs and depth + 1 + theirs[child] < best:
+                    best = depth + 1 + theirs[child]
+                    meet = child
+        if budget is not None and budget.status is not Status.FINISHED:
+            meet = None
+            break
+        generated += len(following)
+        frontiers[side] = following
+    node: Optional[Node[T]] = None if meet is None else _join(meet, parents, depths)
+    if stats is not None:
+        stats.finish(started, generated, node)
+    return node
+
+
+@stops_tracing
+def bidirectional_astar(
+    initial: T,
+    goal: T,
+    successors: Callable[[T], list],
+    heuristic: Callable[[T], float],
+    reverse_heuristic: Callable[[T], float],
+    predecessors: Optional[Callable[[T], list]] = None,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    weighted: bool = False,
+) -> Optional[Node[T]]:
+    """astar from both ends: heuristic estimates the cost to goal and
+    reverse_heuristic the cost from initial, both must be admissible.
+    predecessors is as for bidirectional_bfs; with weighted=True it returns
+    (state, cost of the edge into the given state) pairs. Each step expands
+    the smaller frontier, and the search stops once neither frontier can
+    lead to a path cheaper than the best meeting found."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    expand = (successors, successors if predecessors is None else predecessors)
+    heuristics = (heuristic, reverse_heuristic)
+    parents: tuple[dict[T, Optional[T]], dict[T, Optional[T]]] = (
+        {initial: None},
+        {goal: None},
+    )
+    costs: tuple[dict[T, float], dict[T, float]] = ({initial: 0.0}, {goal: 0.0})
+    h0: tuple[float, float] = (heuristic(initial), reverse_heuristic(goal))
+    # (f, h, push count, state, cost), as in astar
+    frontiers: tuple[list[tuple[float, float, int, T, float]], ...] = (
+        [(h0[0], h0[0], 0, initial, 0.0)],
+        [(h0[1], h0[1], 0, goal, 0.0)],
+    )
+    best: float = 0.0 if initial == goal else inf
+    meet: Optional[T] = initial if initial == goal else None
+    pushed: int = 0
+
+    while frontiers[0] and frontiers[1]:
+        if best <= max(frontiers[0][0][0], frontiers[1][0][0]):
+            break
+        side: int = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        mine, theirs = costs[side], costs[1 - side]
+        _, h, _, state, cost = heappop(frontiers[side])
+        if mine[state] < cost:
+            if stats is not None:
+                stats.stale += 1
+            continue
+        if budget is not None and not budget.spend(Node(state, None, cost, h), -h):
+            break
+        if stats is not None:
+            stats.expand(Node(state, None, cost, h), len(frontiers[side]))
+        for edge in expand[side](state):
+            child, step = edge if weighted else (edge, 1)
+            new_cost: float = cost + step
+            if child not in mine or mine[child] > new_cost:
+                mine[child] = new_cost
+                parents[side][child] = state
+                h = heuristics[side](child)
+                pushed += 1
+                heappush(frontiers[side], (new_cost + h, h, pushed, child, new_cost))
+                if child in theirs and new_cost + theirs[child] < best:
+                    best = new_cost + theirs[child]
+                    meet = child
+    if budget is not None and budget.status is not Status.FINISHED:
+        meet = None
+    node: Optional[Node[T]] = None if meet is None else _join(meet, parents, costs)
+    if stats is not None:
+        stats.finish(started, pushed, node)
+    return node
+
+
+@stops_tracing
+def ida_star(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list],
+    heuristic: Callable[[T], float],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    weighted: bool = False,
+    table: int = 100_000,
+) -> Optional[Node[T]]:
+    """Iterative-deepening A*: depth-first searches that prune at f = cost +
+    heuristic above a bound, which rises each round to the smallest f pruned.
+
+    Memory holds the current path and a table of the lowest cost at which up
+    to `table` states were reached in the round, the oldest entries making
+    room for new ones; a state reached again at no lower cost is pruned.
+    With table=0 only the path is checked for repeated states, and states
+    reached along many paths are searched again each time. With an
+    admissible heuristic the path found is a cheapest one; successors and
+    weighted are as for astar.
+    """
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    root: Node[T] = Node(initial, None, 0.0, heuristic(initial))
+    bound: float = root.heuristic
+    found: Optional[Node[T]] = root if goal_test(initial) else None
+    generated: int = 0
+
+    while found is None and bound < inf:
+        exceeded: float = inf  # the smallest f above the bound
+        # the path as (node, iterator over the children still to try)
+        path: list[tuple[Node[T], Iterator]] = [(root, iter(successors(initial)))]
+        on_path: set[T] = {initial}
+        reached: dict[T, float] = {}  # insertion ordered, oldest first
+        while path and found is None:
+            node, children = path[-1]
+            for edge in children:
+                child, step = edge if weighted else (edge, 1)
+                if child in on_path:
+                    continue
+                cost: float = node.cost + step
+                h: float = heuristic(child)
+                if cost + h > bound:
+                    exceeded = min(exceeded, cost + h)
+                    continue
+                if table:
+                    if reached.get(child, inf) <= cost:
+                        continue
+                    reached.pop(child, None)
+                    if len(reached) >= table:
+                        del reached[next(iter(reached))]
+                    reached[child] = cost
+                child_node: Node[T] = Node(child, node, cost, h)
+                generated += 1
+                if budget is not None and not budget.spend(child_node, -h):
+                    path.clear()
+                    break
+                if stats is not None:
+                    stats.expand(child_node, len(path))
+                if goal_test(child):
+                    found = child_node
+                    break
+                on_path.add(child)
+                path.append((child_node, iter(successors(child))))
+                break
+            else:
+                path.pop()
+                on_path.discard(node.state)
+        if budget is not None and budget.status is not Status.FINISHED:
+            break
+        bound = exceeded
+    if stats is not None:
+        stats.finish(started, generated, found)
+    return found
+
+
+def iddfs(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list[T]],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    table: int = 100_000,
+) -> Optional[Node[T]]:
+    """Iterative deepening dfs: depth-limited searches with limits 0, 1, 2...
+    find a shortest path in the memory of ida_star."""
+    return ida_star(
+        initial,
+        goal_test,
+        successors,
+        lambda state: 0.0,
+        stats,
+        budget,
+        table=table,
+    )
+
+
+@stops_tracing
+def beam_search(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], list],
+    heuristic: Callable[[T], float],
+    width: int = 100,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    weighted: bool = False,
+) -> Optional[Node[T]]:
+    """Level by level, keeping only the `width` children of lowest cost +
+    heuristic; the cheapest goal among the children ends the search. Memory
+    is bounded by the width, but a path may be missed and the one found need
+    not be the cheapest. Repeated states are only checked against the
+    previous and the current level."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    beam: list[Node[T]] = [Node(initial, None, 0.0, heuristic(initial))]
+    found: Optional[Node[T]] = beam[0] if goal_test(initial) else None
+    previous: set[T] = set()
+    generated: int = 0
+
+    while beam and found is None:
+        current: set[T] = {node.state for node in beam}
+        children: dict[T, Node[T]] = {}
+        for node in beam:
+            if budget is not None and not budget.spend(node, -node.heuristic):
+                break
+            if stats is not None:
+                stats.expand(node, len(beam))
+            for edge in successors(node.state):
+                child, step = edge if weighted else (edge, 1)
+                if child in current or child in previous:
+                    continue
+                cost: float = node.cost + step
+                if child not in children or children[child].cost > cost:
+                    children[child] = Node(child, node, cost, heuristic(child))
+        if budget is not None and budget.status is not Status.FINISHED:
+            break
+        generated += len(children)
+        beam = nsmallest(
+            width, children.values(), key=lambda n: (n.cost + n.heuristic, n.heuristic)
+        )
+        goals: list[Node[T]] = [n for n in children.values() if goal_test(n.state)]
+        if goals:
+            found = min(goals, key=lambda n: n.cost)
+        previous = current
+    if stats is not None:
+        stats.finish(started, generated, found)
+    return found
+
+
 if __name__ == "__main__":
     import random
     import timeit
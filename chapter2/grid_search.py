@@ -0,0 +1,324 @@
+"""Shortest paths specialised to the grid of a Maze.
+
+jps() is Jump Point Search (Harabor and Grastien): A* that, rather than
+pushing every open neighbor, runs along straight and diagonal lines until a
+cell where an optimal path may have to turn, so only those jump points reach
+the heap. It needs every move to cost the same and ignores the terrain of the
+maze. With diagonal=True a cell also reaches its four diagonal neighbors, at
+sqrt(2) a move, when both cells beside the move are open.
+
+A DistanceField keeps the number of steps from every cell to one goal, from
+a single bfs out of the goal; the shortest path from any start is then read
+off it in time proportional to the path length.
+"""
+
+from __future__ import annotations
+
+from array import array
+from heapq import heappop, heappush
+from math import inf, sqrt
+from time import perf_counter
+from typing import Optional
+
+from generic_search import Budget, Node, SearchStats, node_to_path, stops_tracing
+from maze import Maze, MazeLocation
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+UNSEEN: int = -1
+DIAGONAL: float = sqrt(2)
+_OPEN: bytes = bytes([0]) + bytes([1]) * 255  # any open cell becomes 1
+
+
+def _padded(maze: Maze) -> tuple[bytearray, int]:
+    """The open cells of the maze as 1s framed by blocked 0s, so that no move
+    needs a bounds check, and the width of a framed row."""
+    columns: int = maze.columns
+    width: int = columns + 2
+    grid: bytearray = bytearray(width * (maze.rows + 2))
+    for r in range(maze.rows):
+        first: int = (r + 1) * width + 1
+        grid[first : first + columns] = maze._cells[r * columns : (r + 1) * columns]
+    return grid.translate(_OPEN), width
+
+
+def _jump_straight(grid: bytearray, p: int, d: int, side: int, goal: int) -> int:
+    """The first jump point from p on moving by d, the goal or a cell with an
+    open neighbor across `side` that the cell behind it could not reach."""
+    while grid[p]:
+        if (
+            p == goal
+            or (grid[p + side] and not grid[p - d + side])
+            or (grid[p - side] and not grid[p - d - side])
+        ):
+            return p
+        p += d
+    return UNSEEN
+
+
+def _row_jumps(grid: bytearray, p: int, d: int, width: int, goal: int) -> bool:
+    """Whether _jump_straight(grid, p, d, width, goal) finds a jump point,
+    found by byte searches over the rows above and below for the corners it
+    stops at rather than by walking the row in Python."""
+    if d > 0:
+        first, last = p, grid.find(0, p)
+        corner: bytes = b"\x00\x01"
+    else:
+        first, last = grid.rfind(0, 0, p + 1) + 1, p + 1
+        corner = b"\x01\x00"
+    if last - first < 16:  # short enough for the walk to cost less
+        return _jump_straight(grid, p, d, width, goal) != UNSEEN
+    if first <= goal < last:
+        return True
+    return any(
+        grid.find(corner, first + side - (d > 0), last + side + (d < 0)) != UNSEEN
+        for side in (-width, width)
+    )
+
+
+def _jump_vertical(grid: bytearray, p: int, d: int, width: int, goal: int) -> int:
+    """As _jump_straight for 4-connected moves, which cannot cut across later,
+    so a cell from which a row holds a jump point is one too."""
+    while grid[p]:
+        if (
+            p == goal
+            or (grid[p + 1] and not grid[p - d + 1])
+            or (grid[p - 1] and not grid[p - d - 1])
+            or (grid[p + 1] and _row_jumps(grid, p + 1, 1, width, goal))
+            or (grid[p - 1] and _row_jumps(grid, p - 1, -1, width, goal))
+        ):
+            return p
+        p += d
+    return UNSEEN
+
+
+def _jump_diagonal(
+    grid: bytearray, p: int, dv: int, dh: int, width: int, goal: int
+) -> int:
+    while grid[p]:
+        if (
+            p == goal
+            or _jump_straight(grid, p + dh, dh, width, goal) != UNSEEN
+            or _jump_straight(grid, p + dv, dv, 1, goal) != UNSEEN
+        ):
+            return p
+        if not (grid[p + dv] and grid[p + dh]):
+            return UNSEEN
+        p += dv + dh
+    return UNSEEN
+
+
+def _directions(
+    dv: int, dh: int, width: int, diagonal: bool
+) -> list[tuple[int, int]]:
+    """Moves worth jumping along from a cell reached moving by dv + dh, as
+    (vertical, horizontal) parts; (0, 0) for the start."""
+    if dv and dh:
+        return [(dv, 0), (0, dh), (dv, dh)]
+    if dh:
+        moves = [(width, 0), (-width, 0), (0, dh)]
+        return moves + [(width, dh), (-width, dh)] if diagonal else moves
+    if dv:
+        moves = [(0, 1), (0, -1), (dv, 0)]
+        return moves + [(dv, 1), (dv, -1)] if diagonal else moves
+    moves = [(width, 0), (-width, 0), (0, 1), (0, -1)]
+    if diagonal:
+        moves += [(width, 1), (width, -1), (-width, 1), (-width, -1)]
+    return moves
+
+
+def _sign(x: int) -> int:
+    return (x > 0) - (x < 0)
+
+
+def _path(parents: dict[int, int], p: int, width: int) -> Node[MazeLocation]:
+    """Every cell of the path through the jump points that lead to p."""
+    points: list[int] = [p]
+    while parents[points[-1]] != points[-1]:
+        points.append(parents[points[-1]])
+    points.reverse()
+    r, c = divmod(points[0], width)
+    node: Node[MazeLocation] = Node(MazeLocation(r - 1, c - 1), None, 0.0)
+    for point in points[1:]:
+        row, column = divmod(point, width)
+        dr, dc = _sign(row - r), _sign(column - c)
+        step: float = DIAGONAL if dr and dc else 1.0
+        while (r, c) != (row, column):
+            r, c = r + dr, c + dc
+            node = Node(MazeLocation(r - 1, c - 1), node, node.cost + step)
+    return node
+
+
+@stops_tracing
+def jps(
+    maze: Maze,
+    initial: MazeLocation,
+    goal: MazeLocation,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    diagonal: bool = False,
+) -> Optional[Node[MazeLocation]]:
+    """The returned node ends a path through every cell, as from astar; the
+    stats and the budget count jump points and see them as locations."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    grid, width = _padded(maze)
+    start: int = (initial.row + 1) * width + initial.column + 1
+    target: int = (goal.row + 1) * width + goal.column + 1
+
+    def heuristic(p: int) -> float:
+        dr, dc = divmod(p, width)
+        dr, dc = abs(dr - goal.row - 1), abs(dc - goal.column - 1)
+        if diagonal:
+            return max(dr, dc) + (DIAGONAL - 1) * min(dr, dc)
+        return dr + dc
+
+    parents: dict[int, int] = {start: start}
+    costs: dict[int, float] = {start: 0.0}
+    closed: set[int] = set()
+    h: float = heuristic(start)
+    # (f, h, push count, cell): on equal f the cell closer to the goal first
+    frontier: list[tuple[float, float, int, int]] = [(h, h, 0, start)]
+    pushed: int = 0
+    found: Optional[int] = None
+
+    while frontier:
+        _, h, _, p = heappop(frontier)
+        if p in closed:
+            if stats is not None:
+                stats.stale += 1
+            continue
+        closed.add(p)
+        if budget is not None and not budget.spend(p, -h):
+            break
+        if stats is not None:
+            r, c = divmod(p, width)
+            stats.expand(MazeLocation(r - 1, c - 1), len(frontier))
+        if p == target:
+            found = p
+            break
+        parent: int = parents[p]
+        pr, pc = divmod(parent, width)
+        r, c = divmod(p, width)
+        for dv, dh in _directions(
+            _sign(r - pr) * width, _sign(c - pc), width, diagonal
+        ):
+            if dv and dh:
+                if not (grid[p + dv] and grid[p + dh]):
+                    continue
+                point = _jump_diagonal(grid, p + dv + dh, dv, dh, width, target)
+                step: float = DIAGONAL
+            elif dv and diagonal:
+                point = _jump_straight(grid, p + dv, dv, 1, target)
+                step = 1.0
+            elif dv:
+                point = _jump_vertical(grid, p + dv, dv, width, target)
+                step = 1.0
+            else:
+                point = _jump_straight(grid, p + dh, dh, width, target)
+                step = 1.0
+            if point == UNSEEN:
+                continue
+            new_cost: float = costs[p] + step * ((point - p) // (dv + dh))
+            if point not in costs or new_cost < costs[point]:
+                costs[point] = new_cost
+                parents[point] = p
+                h = heuristic(point)
+                pushed += 1
+                heappush(frontier, (new_cost + h, h, pushed, point))
+
+    if budget is not None and budget.best is not None:
+        budget.best = _path(parents, budget.best, width)
+    node: Optional[Node[MazeLocation]] = (
+        None if found is None else _path(parents, found, width)
+    )
+    if stats is not None:
+        stats.finish(started, pushed, node)
+    return node
+
+
+class DistanceField:
+    """Steps from every cell of a maze to `goal`, the maze's own by default,
+    counted by one bfs out of the goal: moves in a maze can be undone, so the
+    steps from the goal are the steps to it. Unreachable cells count -1."""
+
+    def __init__(self, maze: Maze, goal: Optional[MazeLocation] = None) -> None:
+        self.maze: Maze = maze
+        self.goal: MazeLocation = maze.goal if goal is None else goal
+        target: int = maze.index(self.goal)
+        if np is not None:
+            self.distances = self._levels(target)
+            return
+        self.distances = array("i", [UNSEEN]) * maze.size
+        self.distances[target] = 0
+        frontier: list[int] = [target]
+        level: int = 0
+        while frontier:
+            level += 1
+            following: list[int] = []
+            for idx in frontier:
+                for child in maze.neighbors(idx):
+                    if self.distances[child] == UNSEEN:
+                        self.distances[child] = level
+                        following.append(child)
+            frontier = following
+
+    def _levels(self, target: int):
+        distances = np.full(self.maze.size, UNSEEN, dtype=np.int32)
+        distances[target] = 0
+        frontier = np.array([target], dtype=np.int32)
+        level: int = 0
+        while frontier.size:
+            level += 1
+            _, children = self.maze.expand(frontier)
+            children = children[distances[children] == UNSEEN]
+            distances[children] = level
+            frontier = np.unique(children)
+        return distances
+
+    def distance(self, ml: MazeLocation) -> float:
+        """The exact steps to the goal, a perfect heuristic for astar."""
+        steps: int = int(self.distances[self.maze.index(ml)])
+        return inf if steps == UNSEEN else float(steps)
+
+    @stops_tracing
+    def path(
+        self, initial: MazeLocation, stats: Optional[SearchStats] = None
+    ) -> Optional[Node[MazeLocation]]:
+        """A shortest path from initial to the goal, one neighbor a step."""
+        started: float = perf_counter() if stats is None else stats.begin()
+        idx: int = self.maze.index(initial)
+        steps: int = int(self.distances[idx])
+        node: Optional[Node[MazeLocation]] = None
+        if steps != UNSEEN:
+            node = Node(initial, None, 0.0)
+            while steps:
+                if stats is not None:
+                    stats.expand(node, 0)
+                steps -= 1
+                for child in self.maze.neighbors(idx):
+                    if self.distances[child] == steps:
+                        idx = child
+                        break
+                node = Node(self.maze.state(idx), node, node.cost + 1)
+        if stats is not None:
+            stats.finish(started, 0 if node is None else int(node.cost), node)
+        return node
+
+
+if __name__ == "__main__":
+    m: Maze = Maze()
+    stats: SearchStats = SearchStats()
+    solution: Optional[Node[MazeLocation]] = jps(m, m.start, m.goal, stats)
+    if solution is None:
+        print("No solution found using JPS")
+    else:
+        path: list[MazeLocation] = node_to_path(solution)
+        m.mark(path)
+        print(m)
+        print(f"Found solution using {stats.expanded} jump points and {m.paths} hops.")
+        m.clear(path)
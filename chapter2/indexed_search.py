@@ -0,0 +1,244 @@
+"""dfs, bfs and astar over states numbered densely from 0 to size - 1.
+
+The searches of generic_search allocate a Node per reached state and hash the
+states into `explored`. A problem that can number its states, such as the
+cells of a maze, can search with the functions below instead: parents, costs
+and visited flags live in flat arrays indexed by id and only the nodes of the
+returned path are built, so node_to_path() gives the same path as the
+generic dfs and bfs.
+
+goal_test and heuristic take ids, and the SearchStats hooks and Budget.best
+see ids while the search runs. When NumPy is installed and the space can
+`expand` a whole frontier at once, bfs goes level by level in NumPy, unless
+called with vectorize=False; goal_test is then also called with arrays of ids
+and must return a bool array, which comparisons such as
+`lambda idx: idx == goal` do.
+"""
+
+from __future__ import annotations
+
+from array import array
+from heapq import heappop, heappush
+from math import inf
+from time import perf_counter
+from typing import Any, Callable, Iterable, Optional, Protocol
+
+from generic_search import Budget, Node, SearchStats, T, stops_tracing
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+UNSEEN: int = -1  # parent of the states not reached yet
+
+
+class IndexedSpace(Protocol[T]):
+    size: int
+
+    def index(self, state: T) -> int:
+        ...
+
+    def state(self, idx: int) -> T:
+        ...
+
+    def neighbors(self, idx: int) -> Iterable[int]:
+        """Ids of the successors, in the order successors() gives them."""
+        ...
+
+
+def _path(space: IndexedSpace[T], parents: Any, idx: int) -> Node[T]:
+    ids: list[int] = [idx]
+    while parents[ids[-1]] != ids[-1]:
+        ids.append(parents[ids[-1]])
+    node: Optional[Node[T]] = None
+    for depth, i in enumerate(reversed(ids)):
+        node = Node(space.state(int(i)), node, float(depth))
+    return node
+
+
+def _finish(
+    space: IndexedSpace[T],
+    parents: Any,
+    goal: Optional[int],
+    started: float,
+    generated: int,
+    stats: Optional[SearchStats],
+    budget: Optional[Budget],
+) -> Optional[Node[T]]:
+    if budget is not None and budget.best is not None:
+        budget.best = _path(space, parents, budget.best)
+    node: Optional[Node[T]] = None if goal is None else _path(space, parents, goal)
+    if stats is not None:
+        stats.finish(started, generated, node)
+    return node
+
+
+def _parents(size: int) -> array:
+    return array("i", [UNSEEN]) * size
+
+
+@stops_tracing
+def dfs(
+    space: IndexedSpace[T],
+    initial: T,
+    goal_test: Callable[[int], bool],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+) -> Optional[Node[T]]:
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    start: int = space.index(initial)
+    parents: array = _parents(space.size)
+    depths: array = array("i", [0]) * space.size
+    parents[start] = start
+    frontier: list[int] = [start]
+    generated: int = 0
+    neighbors: Callable[[int], Iterable[int]] = space.neighbors
+
+    while frontier:
+        idx: int = frontier.pop()
+        if budget is not None and not budget.spend(idx, depths[idx]):
+            break
+        if stats is not None:
+            stats.expand(idx, len(frontier))
+        if goal_test(idx):
+            return _finish(space, parents, idx, started, generated, stats, budget)
+        for child in neighbors(idx):
+            if parents[child] == UNSEEN:
+                parents[child] = idx
+                depths[child] = depths[idx] + 1
+                frontier.append(child)
+                generated += 1
+    return _finish(space, parents, None, started, generated, stats, budget)
+
+
+@stops_tracing
+def bfs(
+    space: IndexedSpace[T],
+    initial: T,
+    goal_test: Callable[[int], bool],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+    vectorize: bool = True,
+) -> Optional[Node[T]]:
+    if (
+        vectorize
+        and np is not None
+        and hasattr(space, "expand")
+        and budget is None
+        and (stats is None or stats.on_expand is None)
+    ):
+        return _bfs_levels(space, initial, goal_test, stats)
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    start: int = space.index(initial)
+    parents: array = _parents(space.size)
+    parents[start] = start
+    # one list per level keeps the FIFO order and gives the depth for free
+    frontier: list[int] = [start]
+    depth: int = 0
+    generated: int = 0
+    neighbors: Callable[[int], Iterable[int]] = space.neighbors
+
+    while frontier:
+        following: list[int] = []
+        for position, idx in enumerate(frontier):
+            if budget is not None and not budget.spend(idx, depth):
+                return _finish(space, parents, None, started, generated, stats, budget)
+            if stats is not None:
+                stats.expand(idx, len(frontier) - position - 1 + len(following))
+            if goal_test(idx):
+                return _finish(space, parents, idx, started, generated, stats, budget)
+            for child in neighbors(idx):
+                if parents[child] == UNSEEN:
+                    parents[child] = idx
+                    following.append(child)
+        generated += len(following)
+        frontier = following
+        depth += 1
+    return _finish(space, parents, None, started, generated, stats, budget)
+
+
+def _bfs_levels(
+    space: Any,
+    initial: T,
+    goal_test: Callable[[Any], Any],
+    stats: Optional[SearchStats],
+) -> Optional[Node[T]]:
+    """bfs one level at a time: space.expand(frontier) returns the (parent,
+    child) id pairs of the frontier ordered by parent then by neighbor, so the
+    first parent of every child and the order of the next level match the
+    FIFO queue of the generic bfs."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    start: int = space.index(initial)
+    parents = np.full(space.size, UNSEEN, dtype=np.int32)
+    parents[start] = start
+    frontier = np.array([start], dtype=np.int32)
+    goal: Optional[int] = start if goal_test(start) else None
+    generated: int = 0
+    while goal is None and frontier.size:
+        if stats is not None:
+            stats.expanded += frontier.size
+            stats.max_frontier = max(stats.max_frontier, frontier.size)
+        sources, children = space.expand(frontier)
+        fresh = parents[children] == UNSEEN
+        sources, children = sources[fresh], children[fresh]
+        # a child reached from several parents keeps the first pair, and the
+        # first pairs in their order are the next level
+        reached, first = np.unique(children, return_index=True)
+        parents[reached] = sources[first]
+        frontier = children[np.sort(first)]
+        generated += frontier.size
+        hits = np.flatnonzero(goal_test(frontier))
+        if hits.size:
+            goal = int(frontier[hits[0]])
+    return _finish(space, parents, goal, started, generated, stats, None)
+
+
+@stops_tracing
+def astar(
+    space: IndexedSpace[T],
+    initial: T,
+    goal_test: Callable[[int], bool],
+    heuristic: Callable[[int], float],
+    stats: Optional[SearchStats] = None,
+    budget: Optional[Budget] = None,
+) -> Optional[Node[T]]:
+    """A* with unit steps; a state is expanded once, so the heuristic should
+    be consistent, as the manhattan distance in a maze is."""
+    started: float = perf_counter() if stats is None else stats.begin()
+    if budget is not None:
+        budget.start()
+    start: int = space.index(initial)
+    parents: array = _parents(space.size)
+    costs: array = array("d", [inf]) * space.size
+    closed: bytearray = bytearray(space.size)
+    parents[start] = start
+    costs[start] = 0.0
+    # (f, push count, id): ties leave the heap first in, first out
+    frontier: list[tuple[float, int, int]] = [(heuristic(start), 0, start)]
+    pushed: int = 0
+    neighbors: Callable[[int], Iterable[int]] = space.neighbors
+
+    while frontier:
+        f, _, idx = heappop(frontier)
+        if closed[idx]:
+            continue  # a stale entry, the state was reached more cheaply
+        closed[idx] = 1
+        if budget is not None and not budget.spend(idx, costs[idx] - f):
+            break
+        if stats is not None:
+            stats.expand(idx, len(frontier))
+        if goal_test(idx):
+            return _finish(space, parents, idx, started, pushed, stats, budget)
+        new_cost: float = costs[idx] + 1
+        for child in neighbors(idx):
+            if new_cost < costs[child]:
+                costs[child] = new_cost
+                parents[child] = idx
+                pushed += 1
+                heappush(frontier, (new_cost + heuristic(child), pushed, child))
+    return _finish(space, parents, None, started, pushed, stats, budget)
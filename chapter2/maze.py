@@ -1,11 +1,17 @@
 import math
 import random
+from array import array
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
 from typing import Callable, Collection, Optional
 
-from generic_search import Node, T, astar, bfs, dfs, node_to_path
+from generic_search import Node, SearchStats, T, astar, bfs, dfs, node_to_path
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
 
 
 class Cell(str, Enum):
@@ -16,6 +22,16 @@ class Cell(str, Enum):
     EMPTY = " "
 
 
+# a maze keeps one byte a cell; blocked is 0, so a cell can be entered exactly
+# when its byte is true
+BLOCKED, EMPTY, START, GOAL, PATH = range(5)
+_GLYPHS: bytes = bytes.maketrans(
+    bytes(range(5)),
+    "".join((Cell.BLOCKED, Cell.EMPTY, Cell.START, Cell.GOAL, Cell.PATH)).encode(),
+)
+_BLOCK: int = 2**22  # cells drawn at once, which bounds the temporary arrays
+
+
 @dataclass(frozen=True)
 class MazeLocation:
     row: int
@@ -29,64 +45,149 @@ class Maze:
     start: MazeLocation = MazeLocation(0, 0)
     goal: MazeLocation = MazeLocation(9, 9)
     sparseness: float = 0.2
+    terrain: int = 1  # cells cost 1 to terrain to enter, see weighted_successors
 
     def __post_init__(self):
-        self._grid = [
-            [Cell.EMPTY for c in range(self.columns)] for r in range(self.rows)
-        ]
-        self._randomly_fill()
-        self._grid[self.start.row][self.start.column] = Cell.START
-        self._grid[self.goal.row][self.goal.column] = Cell.GOAL
-        self.count: int = 0
+        # the codes above by id, row * columns + column; with NumPy they are
+        # written through an array over the same bytes
+        self._cells: bytearray = bytearray(self.size)
+        self._costs: Optional[array] = None
+        if np is None:
+            self._randomly_fill()
+        else:
+            self._randomly_fill_arrays()
+        self._cells[self.index(self.start)] = START
+        self._cells[self.index(self.goal)] = GOAL
+        self._moves = None  # built by expand()
 
     def _randomly_fill(self) -> None:
-        for r in range(self.rows):
-            for c in range(self.columns):
-                if random.uniform(0.0, 1.0) < self.sparseness:
-                    self._grid[r][c] = Cell.BLOCKED
+        for idx in range(self.size):
+            if random.uniform(0.0, 1.0) >= self.sparseness:
+                self._cells[idx] = EMPTY
+        if self.terrain > 1:
+            self._costs = array(
+                "i", (random.randint(1, self.terrain) for idx in range(self.size))
+            )
+
+    def _randomly_fill_arrays(self) -> None:
+        # seeded from the random module, so random.seed() still fixes the maze
+        rng = np.random.default_rng(random.getrandbits(64))
+        cells = np.frombuffer(self._cells, dtype=np.uint8)
+        for first in range(0, self.size, _BLOCK):
+            last: int = min(first + _BLOCK, self.size)
+            draw = rng.random(last - first, dtype=np.float32)
+            cells[first:last] = draw >= self.sparseness  # EMPTY, else BLOCKED
+        if self.terrain > 1:
+            costs = rng.integers(1, self.terrain, self.size, np.int32, endpoint=True)
+            self._costs = array("i", costs.tobytes())
 
     def __str__(self) -> str:
-        border: str = "-" * self.columns + "\n"
-        output: str = ""
-        for row in self._grid:
-            output += "".join(c for c in row) + "\n"
-        return border + output + border.strip()
+        border: str = "-" * self.columns
+        text: str = self._cells.translate(_GLYPHS).decode()
+        rows: list[str] = [
+            text[first : first + self.columns]
+            for first in range(0, self.size, self.columns)
+        ]
+        return "\n".join([border, *rows, border])
 
     def goal_test(self, ml: MazeLocation) -> bool:
-        self.count += 1
         return ml == self.goal
 
     def successors(self, ml: MazeLocation) -> list[MazeLocation]:
+        cells: bytearray = self._cells
+        columns: int = self.columns
+        idx: int = ml.row * columns + ml.column
         locations: list[MazeLocation] = []
-        if ml.row + 1 < self.rows and self._grid[ml.row + 1][ml.column] != Cell.BLOCKED:
+        if ml.row + 1 < self.rows and cells[idx + columns]:
             locations.append(MazeLocation(ml.row + 1, ml.column))
-        if ml.row - 1 >= 0 and self._grid[ml.row - 1][ml.column] != Cell.BLOCKED:
+        if ml.row - 1 >= 0 and cells[idx - columns]:
             locations.append(MazeLocation(ml.row - 1, ml.column))
-        if (
-            ml.column + 1 < self.columns
-            and self._grid[ml.row][ml.column + 1] != Cell.BLOCKED
-        ):
+        if ml.column + 1 < columns and cells[idx + 1]:
             locations.append(MazeLocation(ml.row, ml.column + 1))
-        if ml.column - 1 >= 0 and self._grid[ml.row][ml.column - 1] != Cell.BLOCKED:
+        if ml.column - 1 >= 0 and cells[idx - 1]:
             locations.append(MazeLocation(ml.row, ml.column - 1))
         return locations
 
+    def weighted_successors(self, ml: MazeLocation) -> list[tuple[MazeLocation, int]]:
+        if self._costs is None:
+            return [(location, 1) for location in self.successors(ml)]
+        return [
+            (location, self._costs[self.index(location)])
+            for location in self.successors(ml)
+        ]
+
+    # the maze as an indexed_search.IndexedSpace: a location's id is its cell
+
+    @property
+    def size(self) -> int:
+        return self.rows * self.columns
+
+    def index(self, ml: MazeLocation) -> int:
+        return ml.row * self.columns + ml.column
+
+    def state(self, idx: int) -> MazeLocation:
+        return MazeLocation(*divmod(idx, self.columns))
+
+    def neighbors(self, idx: int) -> list[int]:
+        cells: bytearray = self._cells
+        columns: int = self.columns
+        column: int = idx % columns
+        ids: list[int] = []
+        if idx + columns < self.size and cells[idx + columns]:
+            ids.append(idx + columns)
+        if idx >= columns and cells[idx - columns]:
+            ids.append(idx - columns)
+        if column + 1 < columns and cells[idx + 1]:
+            ids.append(idx + 1)
+        if column > 0 and cells[idx - 1]:
+            ids.append(idx - 1)
+        return ids
+
+    def expand(self, frontier):
+        """(parent, child) ids of the open neighbors of a NumPy array of ids,
+        ordered by parent and then as in successors()."""
+        if self._moves is None:
+            # bit d of a cell is set when its neighbor in direction d is open
+            cells = np.frombuffer(self._cells, dtype=np.uint8)
+            is_open = (cells != BLOCKED).view(np.uint8).reshape(
+                self.rows, self.columns
+            )
+            moves = np.zeros_like(is_open)
+            moves[:-1, :] |= is_open[1:, :]
+            moves[1:, :] |= is_open[:-1, :] << 1
+            moves[:, :-1] |= is_open[:, 1:] << 2
+            moves[:, 1:] |= is_open[:, :-1] << 3
+            self._moves = moves.ravel()
+        steps = np.array([self.columns, -self.columns, 1, -1], dtype=frontier.dtype)
+        valid = (self._moves[frontier][:, None] >> np.arange(4, dtype=np.uint8)) & 1
+        valid = valid.view(np.bool_)
+        children = frontier[:, None] + steps
+        parents = np.broadcast_to(frontier[:, None], children.shape)
+        return parents[valid], children[valid]
+
+    def _paint(self, paths: list[MazeLocation], code: int) -> None:
+        if np is not None and paths:
+            ids = np.fromiter(
+                (ml.row * self.columns + ml.column for ml in paths),
+                dtype=np.intp,
+                count=len(paths),
+            )
+            np.frombuffer(self._cells, dtype=np.uint8)[ids] = code
+        else:
+            for ml in paths:
+                self._cells[self.index(ml)] = code
+        self._cells[self.index(self.start)] = START
+        self._cells[self.index(self.goal)] = GOAL
+
     def mark(self, paths: list[MazeLocation]) -> None:
-        for ml in paths:
-            self._grid[ml.row][ml.column] = Cell.PATH
-        self._grid[self.start.row][self.start.column] = Cell.START
-        self._grid[self.goal.row][self.goal.column] = Cell.GOAL
+        self._paint(paths, PATH)
 
     def clear(self, paths: list[MazeLocation]) -> None:
-        for ml in paths:
-            self._grid[ml.row][ml.column] = Cell.EMPTY
-        self._grid[self.start.row][self.start.column] = Cell.START
-        self._grid[self.goal.row][self.goal.column] = Cell.GOAL
-        self.count = 0
+        self._paint(paths, EMPTY)
 
     @property
     def paths(self) -> int:
-        return sum(c == Cell.PATH for row in self._grid for c in row)
+        return self._cells.count(PATH)
 
 
 def euclidean_distance(goal: MazeLocation) -> Callable[[MazeLocation], float]:
@@ -109,27 +210,34 @@ def manhattan_distance(goal: MazeLocation) -> Callable[[MazeLocation], float]:
 
 if __name__ == "__main__":
     m = Maze()
-    solution1: Optional[Node[MazeLocation]] = dfs(m.start, m.goal_test, m.successors)
+    stats: SearchStats = SearchStats()
+    solution1: Optional[Node[MazeLocation]] = dfs(
+        m.start, m.goal_test, m.successors, stats
+    )
     if solution1 is None:
         print("No solution found using DFS")
     else:
         paths = node_to_path(solution1)
         m.mark(paths)
         print(m)
-        print(f"Found solution using {m.count} comparison and {m.paths} hops.")
+        print(f"Found solution using {stats.expanded} comparison and {m.paths} hops.")
         m.clear(paths)
-    solution2: Optional[Node[MazeLocation]] = bfs(m.start, m.goal_test, m.successors)
+    stats = SearchStats()
+    solution2: Optional[Node[MazeLocation]] = bfs(
+        m.start, m.goal_test, m.successors, stats
+    )
     if solution2 is None:
         print("No solution found using BFS")
     else:
         paths = node_to_path(solution2)
         m.mark(paths)
         print(m)
-        print(f"Found solution using {m.count} comparison and {m.paths} hops.")
+        print(f"Found solution using {stats.expanded} comparison and {m.paths} hops.")
         m.clear(paths)
     distance: Callable[[MazeLocation], float] = manhattan_distance(m.goal)
+    stats = SearchStats()
     solution3: Optional[Node[MazeLocation]] = astar(
-        m.start, m.goal_test, m.successors, distance
+        m.start, m.goal_test, m.successors, distance, stats
     )
     if solution3 is None:
         print("No solution found using A*")
@@ -137,5 +245,5 @@ if __name__ == "__main__":
         paths = node_to_path(solution3)
         m.mark(paths)
         print(m)
-        print(f"Found solution using {m.count} comparison and {m.paths} hops.")
+        print(f"Found solution using {stats.expanded} comparison and {m.paths} hops.")
         m.clear(paths)
@@ -3,52 +3,85 @@ from __future__ import annotations
 from textwrap import dedent
 from typing import Final, Optional
 
-from generic_search import Node, bfs, dfs, node_to_path
+from generic_search import Node, SearchStats, bfs, dfs, node_to_path
 
 MAX_NUM: Final[int] = 3
+BOAT_CAPACITY: Final[int] = 2
 
-COUNT: int = 0
+
+def boatloads(capacity: int) -> list[tuple[int, int]]:
+    """(missionaries, cannibals) the boat can carry without the cannibals
+    outnumbering the missionaries on board."""
+    return (
+        [(m, 0) for m in range(capacity, 0, -1)]
+        + [(0, c) for c in range(capacity, 0, -1)]
+        + [
+            (m, c)
+            for m in range(capacity - 1, 0, -1)
+            for c in range(min(m, capacity - m), 0, -1)
+        ]
+    )
 
 
 class MCState:
-    def __init__(self, missionaries: int, cannibals: int, boat: bool):
+    def __init__(
+        self,
+        missionaries: int,
+        cannibals: int,
+        boat: bool,
+        max_num: int = MAX_NUM,
+        capacity: int = BOAT_CAPACITY,
+    ):
         self.wm: int = missionaries
         self.wc: int = cannibals
-        self.em: int = MAX_NUM - self.wm
-        self.ec: int = MAX_NUM - self.wc
+        self.max_num: int = max_num
+        self.capacity: int = capacity
+        self.em: int = max_num - self.wm
+        self.ec: int = max_num - self.wc
         self.boat: bool = boat
 
     def goal_test(self) -> bool:
-        global COUNT
-        COUNT += 1
-        return self.is_legal and self.em == MAX_NUM and self.ec == MAX_NUM
+        return self.is_legal and self.em == self.max_num and self.ec == self.max_num
 
     def successors(self) -> list[MCState]:
         sucs: list[MCState] = []
-        if self.boat:  # boat is on the west bank
-            if self.wm > 1:
-                sucs.append(MCState(self.wm - 2, self.wc, not self.boat))
-            if self.wm > 0:
-                sucs.append(MCState(self.wm - 1, self.wc, not self.boat))
-            if self.wc > 1:
-                sucs.append(MCState(self.wm, self.wc - 2, not self.boat))
-            if self.wc > 0:
-                sucs.append(MCState(self.wm, self.wc - 1, not self.boat))
-            if self.wm > 0 and self.wc > 0:
-                sucs.append(MCState(self.wm - 1, self.wc - 1, not self.boat))
-        else:
-            if self.em > 1:
-                sucs.append(MCState(self.wm + 2, self.wc, not self.boat))
-            if self.em > 0:
-                sucs.append(MCState(self.wm + 1, self.wc, not self.boat))
-            if self.ec > 1:
-                sucs.append(MCState(self.wm, self.wc + 2, not self.boat))
-            if self.ec > 0:
-                sucs.append(MCState(self.wm, self.wc + 1, not self.boat))
-            if self.em > 0 and self.ec > 0:
-                sucs.append(MCState(self.wm + 1, self.wc + 1, not self.boat))
+        # the boat takes a load from its bank: people leave the west bank
+        # when it is there and come back to it otherwise
+        sign: int = -1 if self.boat else 1
+        m_available: int = self.wm if self.boat else self.em
+        c_available: int = self.wc if self.boat else self.ec
+        for m, c in boatloads(self.capacity):
+            if m <= m_available and c <= c_available:
+                sucs.append(
+                    MCState(
+                        self.wm + sign * m,
+                        self.wc + sign * c,
+                        not self.boat,
+                        self.max_num,
+                        self.capacity,
+                    )
+                )
         return [s for s in sucs if s.is_legal]
 
+    def crossings_left(self) -> int:
+        """An admissible heuristic: every crossing but the last one there
+        takes the boat back with someone on it, so a round trip moves at most
+        capacity - 1 people east."""
+        west: int = self.wm + self.wc
+        if west == 0:
+            return 0
+        if not self.boat:
+            west += 1  # someone must bring the boat back
+        if west <= self.capacity:
+            trips: int = 1
+        elif self.capacity <= 1:
+            # a round trip moves nobody east, so the goal is out of reach and
+            # any count is admissible; the one crossing left will do
+            trips = 1
+        else:
+            trips = 2 * -(-(west - self.capacity) // (self.capacity - 1)) + 1
+        return trips if self.boat else trips + 1
+
     @property
     def is_legal(self) -> bool:
         if self.wm > 0 and self.wm < self.wc:
@@ -96,21 +129,26 @@ def display_path(path: list[MCState]) -> None:
 
 if __name__ == "__main__":
     start = MCState(MAX_NUM, MAX_NUM, True)
-    solution: Optional[Node] = bfs(start, MCState.goal_test, MCState.successors)
+    stats: SearchStats = SearchStats()
+    solution: Optional[Node] = bfs(
+        start, MCState.goal_test, MCState.successors, stats
+    )
     if solution is None:
         print("No solution found using BFS")
     else:
         path: list[MCState] = node_to_path(solution)
         print(len(path))
         display_path(path)
-        print(COUNT)
+        print(stats.expanded)
     print("-" * 20)
-    COUNT = 0
-    solution: Optional[Node] = dfs(start, MCState.goal_test, MCState.successors)
+    stats = SearchStats()
+    solution: Optional[Node] = dfs(
+        start, MCState.goal_test, MCState.successors, stats
+    )
     if solution is None:
         print("No solution found using DFS")
     else:
         path: list[MCState] = node_to_path(solution)
         print(len(path))
         display_path(path)
-        print(COUNT)
+        print(stats.expanded)
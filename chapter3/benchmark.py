@@ -0,0 +1,721 @@
+"""Compare solver configurations on the chapter's example problems."""
+
+import pickle
+import random
+import tempfile
+from itertools import permutations
+from time import perf_counter
+from typing import Callable, Optional
+
+from cache import SolutionCache
+from circuit_board import CircuitBoardConstraint, Rectangle, generate_domain
+from circuit_board import generate_grid as generate_board
+from csp import (
+    CSP,
+    Budget,
+    Constraint,
+    Propagation,
+    SolverStats,
+    Status,
+    dom_wdeg,
+    first_unassigned,
+    geometric,
+    least_constraining_value,
+    luby,
+    minimum_remaining_values,
+    mrv_degree,
+)
+from map_coloring import Graph, MapColoringConstraint, minimum_coloring
+from parallel import parallel_count_solutions
+from placement import PlacementConstraint, PlacementIndex
+from queens import QueensConstraint, count_queens, first_queens_solution
+from send_more_money import Cryptarithm, SendMoreMoneyConstraint
+from word_search import find_words
+from word_search import generate_domain as generate_word_domain
+from word_search import generate_grid as generate_letters
+from sudoku import (
+    GridLocation,
+    SudokuConstraint,
+    check_solution,
+    generate_sudoku,
+    solve_puzzle,
+)
+
+AUSTRALIA: list[tuple[str, str]] = [
+    ("Western Australia", "Northern Territory"),
+    ("Western Australia", "South Australia"),
+    ("South Australia", "Northern Territory"),
+    ("Queensland", "Northern Territory"),
+    ("Queensland", "South Australia"),
+    ("Queensland", "New South Wales"),
+    ("New South Wales", "South Australia"),
+    ("Victoria", "South Australia"),
+    ("Victoria", "New South Wales"),
+    ("Victoria", "Tasmania"),
+]
+
+
+def map_coloring_problem() -> CSP:
+    regions: list[str] = list(dict.fromkeys(r for edge in AUSTRALIA for r in edge))
+    csp: CSP[str, str] = CSP(regions, {r: ["red", "blue", "green"] for r in regions})
+    for place1, place2 in AUSTRALIA:
+        csp.add_constraint(MapColoringConstraint(place1, place2))
+    return csp
+
+
+def queens_problem(n: int = 8) -> CSP:
+    columns: list[int] = list(range(1, n + 1))
+    rows: list[int] = list(range(1, n + 1))  # shared, n can be in the millions
+    csp: CSP[int, int] = CSP(columns, {c: rows for c in columns})
+    csp.add_constraint(QueensConstraint(columns))
+    return csp
+
+
+def sudoku_problem() -> CSP:
+    grid = generate_sudoku()
+    cells: list[GridLocation] = [GridLocation(r, c) for r in range(9) for c in range(9)]
+    csp: CSP = CSP(cells, {gl: list(range(1, 10)) for gl in cells})
+    csp.add_constraint(SudokuConstraint(cells, grid))
+    return csp
+
+
+def random_puzzles(count: int, givens: int = 28, seed: int = 0) -> list[dict]:
+    """Relabel and transpose one solved grid, then keep `givens` random cells."""
+    rng = random.Random(seed)
+    solved: dict[GridLocation, int] = solve_puzzle({})
+    cells: list[GridLocation] = list(solved)
+    puzzles: list[dict[GridLocation, int]] = []
+    for _ in range(count):
+        digits: list[int] = rng.sample(range(1, 10), 9)
+        transpose: bool = rng.random() < 0.5
+        puzzles.append(
+            {
+                (GridLocation(gl.column, gl.row) if transpose else gl): digits[
+                    solved[gl] - 1
+                ]
+                for gl in rng.sample(cells, givens)
+            }
+        )
+    return puzzles
+
+
+def sudoku_problem_with(givens: dict[GridLocation, int]) -> CSP:
+    csp: CSP = sudoku_problem()
+    for gl, number in givens.items():
+        csp.domains[gl] = [number]
+    return csp
+
+
+BOARDS: list[tuple[int, int]] = [
+    (9, 1),
+    (7, 3),
+    (5, 2),
+    (2, 1),
+    (5, 1),
+    (2, 1),
+    (3, 2),
+    (2, 1),
+    (2, 3),
+    (2, 2),
+    (2, 7),
+]
+
+
+def circuit_board_problem(seed: int = 0, count: int = 8) -> CSP:
+    grid = generate_board(9, 9)
+    boards: list[Rectangle] = [Rectangle(w, l) for w, l in BOARDS[:count]]
+    random.Random(seed).shuffle(boards)
+    csp: CSP = CSP(boards, {b: generate_domain(b, grid) for b in boards})
+    csp.add_constraint(CircuitBoardConstraint(boards))
+    return csp
+
+
+PROBLEMS: dict[str, Callable[[], CSP]] = {
+    "map coloring": map_coloring_problem,
+    "8 queens": queens_problem,
+    "12 queens": lambda: queens_problem(12),
+    "circuit board": circuit_board_problem,
+}
+
+
+def propagation_table() -> None:
+    print(
+        f"{'problem':<15}{'mode':<6}{'nodes':>10}{'backtracks':>11}"
+        f"{'pruned':>10}{'checks':>10}{'seconds':>10}"
+    )
+    for name, build in PROBLEMS.items():
+        for propagation in Propagation:
+            csp: CSP = build()
+            stats: SolverStats = SolverStats()
+            result = csp.backtracking(propagation=propagation, stats=stats)
+            assert result is not None
+            print(
+                f"{name:<15}{propagation.value:<6}{stats.nodes:>10}"
+                f"{stats.backtracks:>11}{stats.pruned:>10}{stats.checks:>10}"
+                f"{stats.seconds:>10.4f}"
+            )
+
+
+HEURISTICS: dict[str, tuple] = {
+    "first": (first_unassigned, None),
+    "mrv": (minimum_remaining_values, None),
+    "mrv+degree": (mrv_degree, None),
+    "dom/wdeg": (dom_wdeg, None),
+    "mrv+lcv": (minimum_remaining_values, least_constraining_value),
+}
+
+HEURISTIC_PROBLEMS: dict[str, Callable[[], CSP]] = {
+    "12 queens": lambda: queens_problem(12),
+    "sudoku": sudoku_problem,
+    **{
+        f"circuit board #{seed}": (lambda seed=seed: circuit_board_problem(seed, 11))
+        for seed in range(4)
+    },
+}
+
+
+def heuristic_table() -> None:
+    print(f"{'problem':<20}{'heuristic':<12}{'nodes':>10}{'seconds':>10}")
+    for name, build in HEURISTIC_PROBLEMS.items():
+        for label, (select_variable, order_values) in HEURISTICS.items():
+            csp: CSP = build()
+            start: float = perf_counter()
+            result = csp.backtracking(
+                propagation=Propagation.FORWARD_CHECKING,
+                select_variable=select_variable,
+                order_values=order_values,
+            )
+            elapsed: float = perf_counter() - start
+            assert result is not None
+            print(f"{name:<20}{label:<12}{csp.nodes:>10}{elapsed:>10.4f}")
+
+
+def parallel_table(n: int = 10) -> None:
+    print(f"{'solver':<20}{'solutions':>10}{'seconds':>10}")
+    start: float = perf_counter()
+    count: int = queens_problem(n).count_solutions()
+    print(f"{'serial':<20}{count:>10}{perf_counter() - start:>10.4f}")
+    for depth in (1, 2):
+        start = perf_counter()
+        count = parallel_count_solutions(queens_problem(n), depth=depth)
+        print(
+            f"{f'parallel depth={depth}':<20}{count:>10}{perf_counter() - start:>10.4f}"
+        )
+
+
+def parallel_stats_check(n: int = 8) -> None:
+    """SolverStats passed to a parallel search gathers every worker's counts;
+    hooks, which would run in the workers, are refused."""
+    stats: SolverStats = SolverStats()
+    count: int = parallel_count_solutions(queens_problem(n), depth=1, stats=stats)
+    assert stats.solutions == count and stats.nodes > 0
+    try:
+        parallel_count_solutions(
+            queens_problem(n), stats=SolverStats(on_solution=lambda s: None)
+        )
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a hook was sent to the workers")
+
+
+def queens_table(sizes: range = range(8, 21), max_count: int = 12) -> None:
+    """First-solution times for every size, full counts up to max_count."""
+    print(
+        f"{'n':>3}{'csp fc+mrv':>12}{'bitboard':>12}"
+        f"{'solutions':>12}{'count':>12}{'count sym':>12}"
+    )
+    for n in sizes:
+        start: float = perf_counter()
+        queens_problem(n).backtracking(
+            propagation=Propagation.FORWARD_CHECKING,
+            select_variable=minimum_remaining_values,
+        )
+        csp_time: float = perf_counter() - start
+        start = perf_counter()
+        first_queens_solution(n)
+        bitboard_time: float = perf_counter() - start
+        line: str = f"{n:>3}{csp_time:>12.4f}{bitboard_time:>12.4f}"
+        if n <= max_count:
+            start = perf_counter()
+            count_queens(n, symmetry=False)
+            count_time: float = perf_counter() - start
+            start = perf_counter()
+            total: int = count_queens(n)
+            line += f"{total:>12}{count_time:>12.4f}{perf_counter() - start:>12.4f}"
+        print(line)
+
+
+def sudoku_table(count: int = 1000, csp_count: int = 50) -> None:
+    puzzles: list[dict[GridLocation, int]] = random_puzzles(count)
+    print(f"{'solver':<20}{'puzzles':>10}{'seconds':>10}{'puzzles/s':>12}")
+    start: float = perf_counter()
+    for givens in puzzles:
+        assert check_solution(givens, solve_puzzle(givens))
+    elapsed: float = perf_counter() - start
+    print(f"{'bitmask engine':<20}{count:>10}{elapsed:>10.3f}{count / elapsed:>12.1f}")
+    start = perf_counter()
+    for givens in puzzles[:csp_count]:
+        sudoku_problem_with(givens).backtracking(
+            propagation=Propagation.FORWARD_CHECKING,
+            select_variable=minimum_remaining_values,
+        )
+    elapsed = perf_counter() - start
+    print(
+        f"{'csp fc+mrv':<20}{csp_count:>10}{elapsed:>10.3f}{csp_count / elapsed:>12.1f}"
+    )
+
+
+PUZZLES: list[str] = [
+    "SEND + MORE = MONEY",
+    "CROSS + ROADS = DANGER",
+    "TWO + TWO = FOUR",
+    "SO + MANY + MORE + MEN + SEEM + TO + SAY + THAT + THEY + MAY + SOON + TRY"
+    " + TO + STAY + AT + HOME + SO + AS + TO + SEE + OR + HEAR + THE + SAME + ONE"
+    " + MAN + TRY + TO + MEET + THE + TEAM + ON + THE + MOON + AS + HE + HAS + AT"
+    " + THE + OTHER + TEN = TESTS",
+]
+
+
+def cryptarithm_table() -> None:
+    print(f"{'puzzle':<24}{'solver':<22}{'nodes':>10}{'seconds':>10}")
+    # the original two-word constraint, with M preassigned as its example does
+    letters: list[str] = list("SENDMORY")
+    csp: CSP = CSP(letters, {letter: list(range(10)) for letter in letters})
+    csp.add_constraint(SendMoreMoneyConstraint(letters, "SEND", "MORE", "MONEY"))
+    start: float = perf_counter()
+    csp.backtracking({"M": 1})
+    elapsed: float = perf_counter() - start
+    print(
+        f"{'SEND + MORE = MONEY':<24}{'SendMoreMoney':<22}{csp.nodes:>10}{elapsed:>10.4f}"
+    )
+    for text in PUZZLES:
+        puzzle: Cryptarithm = Cryptarithm.parse(text)
+        name: str = text if len(text) < 24 else text[:20] + "..."
+        csp = puzzle.csp()
+        start = perf_counter()
+        csp.backtracking()
+        elapsed = perf_counter() - start
+        print(f"{name:<24}{'column pruning':<22}{csp.nodes:>10}{elapsed:>10.4f}")
+        start = perf_counter()
+        puzzle.solve_vectorized()
+        elapsed = perf_counter() - start
+        print(f"{'':<24}{'vectorized (all)':<22}{'':>10}{elapsed:>10.4f}")
+
+
+def cryptarithm_check(
+    puzzles: tuple[str, ...] = ("X + Y = Y", "AB + CD = AB", "A + BC = BC")
+) -> None:
+    """Both solvers find exactly the digit assignments that make the sum
+    hold, on puzzles whose result also appears among the addends."""
+
+    def value(word: str, digits: dict[str, int]) -> int:
+        return int("".join(str(digits[letter]) for letter in word))
+
+    for text in puzzles:
+        puzzle: Cryptarithm = Cryptarithm.parse(text)
+        expected: list[dict[str, int]] = [
+            digits
+            for row in permutations(range(10), len(puzzle.letters))
+            for digits in [dict(zip(puzzle.letters, row))]
+            if all(digits[letter] for letter in puzzle.leading)
+            and sum(value(word, digits) for word in puzzle.addends)
+            == value(puzzle.result, digits)
+        ]
+        solution: Optional[dict[str, int]] = puzzle.solve()
+        assert (solution is None) == (not expected), text
+        assert solution is None or solution in expected, (text, solution)
+        found: list[dict[str, int]] = puzzle.solve_vectorized()
+        assert sorted(map(sorted, (d.items() for d in found))) == sorted(
+            map(sorted, (d.items() for d in expected))
+        ), text
+        print(f"{text}: {len(expected)} solutions")
+
+
+def placement_problem(size: int, domains: dict) -> tuple[CSP, PlacementIndex]:
+    index: PlacementIndex = PlacementIndex(size, size, domains)
+    csp: CSP = CSP(list(domains), index.masks)
+    csp.add_constraint(PlacementConstraint(index))
+    return csp, index
+
+
+def placement_table(size: int = 50, words: int = 40, boards: int = 30) -> None:
+    rng = random.Random(0)
+    letters = generate_letters(size, size)
+    word_list: list[str] = [
+        "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=rng.randint(4, 12)))
+        for _ in range(words)
+    ]
+    board_list: list[Rectangle] = [
+        Rectangle(rng.randint(2, 12), rng.randint(2, 12)) for _ in range(boards)
+    ]
+    grid = generate_board(size, size)
+    print(
+        f"{'problem':<26}{'placements':>11}{'index MB':>10}"
+        f"{'build s':>9}{'nodes':>8}{'solve s':>9}"
+    )
+    for name, domains in (
+        (
+            f"word search {words} words",
+            {w: generate_word_domain(w, letters) for w in word_list},
+        ),
+        (
+            f"circuit board {boards} boards",
+            {b: generate_domain(b, grid) for b in board_list},
+        ),
+    ):
+        start: float = perf_counter()
+        csp, index = placement_problem(size, domains)
+        build: float = perf_counter() - start
+        start = perf_counter()
+        result = csp.backtracking(
+            propagation=Propagation.FORWARD_CHECKING,
+            select_variable=minimum_remaining_values,
+        )
+        solve: float = perf_counter() - start
+        assert result is not None
+        # parallel.py pickles the CSP, which must then search the same way
+        copy: CSP = pickle.loads(pickle.dumps(csp))
+        copied = copy.backtracking(
+            propagation=Propagation.FORWARD_CHECKING,
+            select_variable=minimum_remaining_values,
+        )
+        # boards hash by identity, so compare the values in variable order
+        assert [result[v] for v in csp.variables] == [
+            copied[v] for v in copy.variables
+        ]
+        placements: int = sum(map(len, domains.values()))
+        print(
+            f"{name + f' {size}x{size}':<26}{placements:>11}"
+            f"{index.memory() / 2**20:>10.1f}{build:>9.2f}{csp.nodes:>8}{solve:>9.3f}"
+        )
+
+
+def word_finder_table(size: int = 1000, words: int = 100_000) -> None:
+    rng = random.Random(0)
+    letters = [rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=size) for _ in range(size)]
+    word_list: list[str] = [
+        "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=rng.randint(3, 10)))
+        for _ in range(words)
+    ]
+    start: float = perf_counter()
+    matches = find_words(letters, word_list)
+    first = next(matches)
+    first_time: float = perf_counter() - start
+    found: int = 1 + sum(1 for _ in matches)
+    elapsed: float = perf_counter() - start
+    print(
+        f"{size}x{size} grid, {words} words: first match {first[0]} after "
+        f"{first_time:.2f}s, {found} matches in {elapsed:.2f}s"
+    )
+
+
+def word_domain_check(grids: int = 900, size: int = 4) -> None:
+    """generate_domain(match_letters=True) lists what find_words finds."""
+    rng = random.Random(0)
+    for _ in range(grids):
+        letters = [rng.choices("AB", k=size) for _ in range(size)]
+        words: list[str] = [
+            "".join(rng.choices("AB", k=rng.randint(2, size))) for _ in range(3)
+        ]
+        found: set = {
+            (word, tuple(locations)) for word, locations in find_words(letters, words)
+        }
+        domains: set = {
+            (word, tuple(locations))
+            for word in words
+            for locations in generate_word_domain(word, letters, match_letters=True)
+        }
+        assert found == domains, (letters, words, found ^ domains)
+    print(f"match_letters domains agree with find_words on {grids} grids")
+
+
+def triangulated_grid(size: int, seed: int = 0) -> Graph:
+    """A planar map: a grid of regions with a random diagonal in every square."""
+    rng = random.Random(seed)
+    edges: list[tuple[str, str]] = []
+    for row in range(size):
+        for column in range(size):
+            if column + 1 < size:
+                edges.append((f"{row},{column}", f"{row},{column + 1}"))
+            if row + 1 < size:
+                edges.append((f"{row},{column}", f"{row + 1},{column}"))
+            if row + 1 < size and column + 1 < size:
+                if rng.random() < 0.5:
+                    edges.append((f"{row},{column}", f"{row + 1},{column + 1}"))
+                else:
+                    edges.append((f"{row},{column + 1}", f"{row + 1},{column}"))
+    rng.shuffle(edges)  # region ids should not follow the grid
+    return Graph.from_edges(edges)
+
+
+def coloring_table(sizes: tuple[int, ...] = (50, 100, 200)) -> None:
+    print(f"{'map':<20}{'regions':>10}{'colors':>8}{'seconds':>10}")
+    for size in sizes:
+        graph: Graph = triangulated_grid(size)
+        start: float = perf_counter()
+        k, colors = minimum_coloring(graph)
+        elapsed: float = perf_counter() - start
+        assert all(
+            colors[v] != colors[u]
+            for v in range(len(graph))
+            for u in graph.adjacency[v]
+        )
+        print(f"{f'{size}x{size} grid':<20}{len(graph):>10}{k:>8}{elapsed:>10.3f}")
+
+
+def map_problem(graph: Graph, colors: int, compiled: bool = True) -> CSP:
+    palette: list[str] = ["red", "green", "blue", "yellow", "purple"][:colors]
+    csp: CSP = CSP(graph.names, {r: palette for r in graph.names}, compiled)
+    for v, adjacent in enumerate(graph.adjacency):
+        for u in adjacent:
+            if v < u:
+                csp.add_constraint(
+                    MapColoringConstraint(graph.names[v], graph.names[u])
+                )
+    return csp
+
+
+def compiled_table(size: int = 4) -> None:
+    """Count every 4-coloring of a small map with and without the tables."""
+    graph: Graph = triangulated_grid(size)
+    print(f"{'mode':<6}{'path':<13}{'colorings':>10}{'nodes':>10}{'seconds':>10}")
+    for propagation in Propagation:
+        for compiled in (False, True):
+            csp: CSP = map_problem(graph, 4, compiled)
+            start: float = perf_counter()
+            count: int = csp.count_solutions(propagation=propagation)
+            elapsed: float = perf_counter() - start
+            path: str = "tables" if compiled else "interpreted"
+            print(
+                f"{propagation.value:<6}{path:<13}{count:>10}"
+                f"{csp.nodes:>10}{elapsed:>10.3f}"
+            )
+
+
+BACKJUMPING_PROBLEMS: dict[str, Callable[[], CSP]] = {
+    "8x8 map, 4 colors": lambda: map_problem(triangulated_grid(8), 4),
+    "sudoku, 24 givens": lambda: sudoku_problem_with(random_puzzles(1, 24, 3)[0]),
+    "12 queens": lambda: queens_problem(12),
+    "circuit board #0": lambda: circuit_board_problem(0, 11),
+}
+
+
+def backjumping_table(seconds: float = 20.0) -> None:
+    """First-solution nodes with chronological backtracking and backjumping."""
+    print(
+        f"{'problem':<20}{'mode':<6}{'search':<12}{'nodes':>10}{'jumps':>8}"
+        f"{'nogood hits':>12}{'seconds':>10}"
+    )
+    for name, build in BACKJUMPING_PROBLEMS.items():
+        for propagation in (Propagation.NONE, Propagation.FORWARD_CHECKING):
+            for label, backjumping, nogoods in (
+                ("chronolog.", False, 0),
+                ("backjumping", True, 0),
+                ("+nogoods", True, 1000),
+            ):
+                csp: CSP = build()
+                stats: SolverStats = SolverStats()
+                budget: Budget = Budget(seconds=seconds)
+                csp.backtracking(
+                    propagation=propagation,
+                    stats=stats,
+                    budget=budget,
+                    backjumping=backjumping,
+                    nogoods=nogoods,
+                )
+                elapsed: str = (
+                    f"{stats.seconds:.3f}"
+                    if budget.status is Status.FINISHED
+                    else "timeout"
+                )
+                print(
+                    f"{name:<20}{propagation.value:<6}{label:<12}{stats.nodes:>10}"
+                    f"{stats.jumps:>8}{stats.nogood_hits:>12}{elapsed:>10}"
+                )
+
+
+def local_search_table(
+    queens: tuple[int, ...] = (1000, 10_000, 100_000, 1_000_000),
+    maps: tuple[int, ...] = (50, 100),
+) -> None:
+    """Min-conflicts on problems far beyond the reach of backtracking."""
+    print(
+        f"{'problem':<24}{'variables':>10}{'moves':>9}{'restarts':>9}"
+        f"{'build s':>9}{'solve s':>9}"
+    )
+    problems: list[tuple[str, Callable[[], CSP]]] = [
+        (f"{n} queens", lambda n=n: queens_problem(n)) for n in queens
+    ] + [
+        (
+            f"{size}x{size} map, 4 colors",
+            lambda size=size: map_problem(triangulated_grid(size), 4),
+        )
+        for size in maps
+    ]
+    for name, build in problems:
+        start: float = perf_counter()
+        csp: CSP = build()
+        built: float = perf_counter() - start
+        stats: SolverStats = SolverStats()
+        result = csp.solve(solver="min-conflicts", seed=0, stats=stats)
+        assert result is not None
+        print(
+            f"{name:<24}{len(csp.variables):>10}{stats.nodes:>9}{stats.restarts:>9}"
+            f"{built:>9.2f}{stats.seconds:>9.2f}"
+        )
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def restart_table(
+    size: int = 9, seeds: int = 50, nodes: int = 50_000, unit: int = 50
+) -> None:
+    """Node and time tails of seeded fc search on one board, over many seeds."""
+    grid = generate_board(size, size)
+    domains: dict = {
+        Rectangle(width, length): generate_domain(Rectangle(width, length), grid)
+        for width, length in BOARDS
+    }
+    print(
+        f"{'restarts':<16}{'median':>8}{'p90':>8}{'p99':>8}{'max':>8}"
+        f"{'p90 s':>8}{'max s':>8}{'unsolved':>10}"
+    )
+    for label, schedule in (
+        ("none", lambda: None),
+        (f"luby({unit})", lambda: luby(unit)),
+        (f"geometric({unit})", lambda: geometric(unit)),
+    ):
+        counts: list[float] = []
+        times: list[float] = []
+        unsolved: int = 0
+        for seed in range(seeds):
+            csp, _ = placement_problem(size, domains)
+            budget: Budget = Budget(nodes=nodes)
+            stats: SolverStats = SolverStats()
+            csp.backtracking(
+                propagation=Propagation.FORWARD_CHECKING,
+                seed=seed,
+                restarts=schedule(),
+                stats=stats,
+                budget=budget,
+            )
+            # unsolved runs count at the cap, so the tails are lower bounds
+            unsolved += budget.status is not Status.FINISHED
+            counts.append(stats.nodes)
+            times.append(stats.seconds)
+        print(
+            f"{label:<16}{percentile(counts, 0.5):>8}{percentile(counts, 0.9):>8}"
+            f"{percentile(counts, 0.99):>8}{max(counts):>8}"
+            f"{percentile(times, 0.9):>8.2f}{max(times):>8.2f}{unsolved:>10}"
+        )
+
+
+def cache_table(puzzles: int = 20, repeats: int = 5) -> None:
+    """Rebuild and solve the same instances again and again, as a service would."""
+    problems: list[tuple[str, Callable[[], CSP]]] = [
+        ("australia", map_coloring_problem),
+        ("20x20 map", lambda: map_problem(triangulated_grid(20), 4)),
+    ] + [
+        (f"sudoku {i}", lambda givens=givens: sudoku_problem_with(givens))
+        for i, givens in enumerate(random_puzzles(puzzles))
+    ]
+    options: dict = dict(
+        propagation=Propagation.FORWARD_CHECKING,
+        select_variable=minimum_remaining_values,
+    )
+    print(
+        f"{'cache':<12}{'solves':>8}{'solve s':>10}{'hits':>8}{'misses':>8}"
+        f"{'hit rate':>10}"
+    )
+    with tempfile.TemporaryDirectory() as path:
+        for label, new_cache in (
+            ("none", lambda: None),
+            ("memory", SolutionCache),
+            ("disk", lambda: SolutionCache(path=path)),
+            # a new process, reading the files the previous one wrote
+            ("disk, warm", lambda: SolutionCache(path=path)),
+        ):
+            cache: Optional[SolutionCache] = new_cache()
+            elapsed: float = 0.0
+            for _ in range(repeats):
+                for _, build in problems:
+                    csp: CSP = build()
+                    start: float = perf_counter()
+                    solution: Optional[dict] = csp.solve(cache=cache, **options)
+                    elapsed += perf_counter() - start
+                    assert csp.is_solution(solution)
+            print(f"{label:<12}{repeats * len(problems):>8}{elapsed:>10.3f}", end="")
+            if cache is None:
+                print()
+            else:
+                print(
+                    f"{cache.stats.hits:>8}{cache.stats.misses:>8}"
+                    f"{cache.stats.hit_rate:>10.0%}"
+                )
+
+
+class RelationConstraint(Constraint[str, int]):
+    """first relation second, for any relation between two values."""
+
+    def __init__(self, first: str, second: str, relation: Callable) -> None:
+        super().__init__([first, second])
+        self.relation: Callable = relation
+
+    def satisfied(self, assignment: dict[str, int]) -> bool:
+        first, second = self.variables
+        if first not in assignment or second not in assignment:
+            return True
+        return self.relation(assignment[first], assignment[second])
+
+
+def fingerprint_check() -> None:
+    """Problems that differ only in a lambda must not share a fingerprint,
+    even though the tuples encoding the first lambda are freed by then."""
+    fingerprints: list[str] = []
+    for relations in (
+        (lambda x, y: x < y, lambda x, y: x != y),
+        (lambda x, y: x < y, lambda x, y: x < y),
+    ):
+        csp: CSP[str, int] = CSP(["a", "b", "c"], {v: [1, 2, 3] for v in "abc"})
+        csp.add_constraint(RelationConstraint("a", "b", relations[0]))
+        csp.add_constraint(RelationConstraint("b", "c", relations[1]))
+        fingerprints.append(csp.fingerprint())
+    assert fingerprints[0] != fingerprints[1]
+
+
+if __name__ == "__main__":
+    propagation_table()
+    print()
+    heuristic_table()
+    print()
+    parallel_stats_check()
+    parallel_table()
+    print()
+    queens_table()
+    print()
+    sudoku_table()
+    print()
+    cryptarithm_check()
+    cryptarithm_table()
+    print()
+    placement_table()
+    print()
+    word_domain_check()
+    word_finder_table()
+    print()
+    coloring_table()
+    print()
+    compiled_table()
+    print()
+    backjumping_table()
+    print()
+    local_search_table()
+    print()
+    restart_table()
+    print()
+    fingerprint_check()
+    cache_table()
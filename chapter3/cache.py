@@ -0,0 +1,123 @@
+"""Solutions of CSPs kept by fingerprint, for CSP.solve(cache=...).
+
+Entries live in memory and, given a directory, on disk as one pickle file per
+fingerprint; both levels are bounded and evict the least recently used entry.
+A cached solution is checked against the problem before it is returned, so an
+entry that no longer solves it (written by an older version of a constraint,
+say) is dropped and counted instead of served. Only use directories you
+trust: loading a pickle file can run code.
+"""
+
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0  # entries dropped because they no longer solved the problem
+    evictions: int = 0  # from memory or from disk
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SolutionCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        max_bytes: int = 64 * 2**20,
+    ) -> None:
+        self.max_entries: int = max_entries
+        self.path: Optional[str] = path
+        self.max_bytes: int = max_bytes
+        self.stats: CacheStats = CacheStats()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, key: str, valid: Callable[[dict], bool] = lambda solution: True
+    ) -> Optional[dict]:
+        solution: Optional[dict] = self._entries.get(key)
+        if solution is None and self.path is not None:
+            solution = self._load(key)
+        if solution is not None and not valid(solution):
+            self.stats.stale += 1
+            self.discard(key)
+            solution = None
+        if solution is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._remember(key, solution)
+        return dict(solution)
+
+    def put(self, key: str, solution: dict) -> None:
+        self._remember(key, dict(solution))
+        if self.path is not None:
+            self._store(key, solution)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self.path is not None:
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key: str, solution: dict) -> None:
+        self._entries[key] = solution
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pickle")
+
+    def _load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._file(key), "rb") as file:
+                solution: dict = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # truncated, or pickled with classes that have since moved
+            self.stats.stale += 1
+            self.discard(key)
+            return None
+        os.utime(self._file(key))  # the mtime orders the files for eviction
+        return solution
+
+    def _store(self, key: str, solution: dict) -> None:
+        # written aside and renamed, so other processes never read half a file
+        partial: str = f"{self._file(key)}.{os.getpid()}.tmp"
+        with open(partial, "wb") as file:
+            pickle.dump(solution, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, self._file(key))
+        files: list[tuple[float, int, str]] = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".pickle"):
+                stat: os.stat_result = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total: int = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # evicted by another process
+                pass
+            total -= size
+            self.stats.evictions += 1
@@ -1,4 +1,5 @@
 """In order to see the table pretty printed (colorful), please install click module."""
+
 from enum import Enum
 from itertools import product
 from typing import NamedTuple, Optional
@@ -11,7 +12,8 @@ except ModuleNotFoundError:
         return text
 
 
-from csp import CSP, Constraint
+from csp import CSP, Constraint, Propagation, luby, minimum_remaining_values
+from placement import PlacementConstraint, PlacementIndex
 
 all_colors = [
     "bright_red",
@@ -90,9 +92,35 @@ class CircuitBoardConstraint(Constraint[str, list[GridLocation]]):
         ]
         return len(set(all_locations)) == len(all_locations)
 
+    def satisfied_delta(
+        self, variable: Rectangle, assignment: dict[Rectangle, list[GridLocation]]
+    ) -> bool:
+        occupied: set[GridLocation] = set(assignment[variable])
+        return all(
+            occupied.isdisjoint(locations)
+            for other, locations in assignment.items()
+            if other != variable
+        )
+
+    def culprits(
+        self, variable: Rectangle, assignment: dict[Rectangle, list[GridLocation]]
+    ) -> list[Rectangle]:
+        occupied: set[GridLocation] = set(assignment[variable])
+        return [
+            other
+            for other, locations in assignment.items()
+            if other != variable and not occupied.isdisjoint(locations)
+        ]
+
 
 if __name__ == "__main__":
     import random
+    import sys
+
+    # python circuit_board.py [SEED] reproduces a run
+    seed: int = int(sys.argv[1]) if len(sys.argv) > 1 else random.randrange(2**32)
+    print(f"seed {seed}")
+    random.seed(seed)
 
     grid: Grid = generate_grid(9, 9)
     boards: list[Rectangle] = [
@@ -115,16 +143,25 @@ if __name__ == "__main__":
     for b in boards:
         locations[b] = generate_domain(b, grid)
 
-    csp: CSP[Rectangle, list[GridLocation]] = CSP(boards, locations)
-    csp.add_constraint(CircuitBoardConstraint(boards))
-
-    result: Optional[dict[Rectangle, list[GridLocation]]] = csp.backtracking()
+    # placements are solved as cell bitsets, see placement.py
+    index: PlacementIndex[Rectangle] = PlacementIndex(
+        len(grid), len(grid[0]), locations
+    )
+    csp: CSP[Rectangle, int] = CSP(boards, index.masks)
+    csp.add_constraint(PlacementConstraint(index))
+
+    result: Optional[dict[Rectangle, int]] = csp.backtracking(
+        propagation=Propagation.FORWARD_CHECKING,
+        select_variable=minimum_remaining_values,
+        seed=seed,
+        restarts=luby(),
+    )
     if result is None:
         print("No solution found")
     else:
         random.shuffle(all_colors)
-        for color, (rec, grid_locations) in zip(all_colors, result.items()):
-            for row, col in grid_locations:
+        for color, (rec, mask) in zip(all_colors, result.items()):
+            for row, col in index.locations(mask):
                 grid[row][col] = style(str(Cell.PATH), fg=color)
 
         display_grid(grid)
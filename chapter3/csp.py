@@ -1,10 +1,93 @@
+import hashlib
+import json
+import random
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from typing import Generic, Optional, TypeVar
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from functools import partial
+from itertools import islice
+from math import inf
+from time import monotonic, perf_counter
+from types import CodeType, FunctionType, MethodType
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    Protocol,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 V = TypeVar("V")  # value type
 D = TypeVar("D")  # domain type
 
+# binary constraints are compiled into tables when their two domains have at
+# most this many pairs of values
+MAX_TABLE_SIZE: int = 100_000
+
+
+def _canonical(value: Any, memo: dict[int, tuple[Any, str]]) -> str:
+    """A repr of value that does not depend on the order of sets and dicts, on
+    object ids or on the module a class was imported from."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes, Enum)):
+        return repr(value)
+    key: int = id(value)
+    if key in memo:  # shared domains and peer lists are encoded once
+        return memo[key][1]
+    if isinstance(value, (list, tuple)):
+        items: str = ",".join(_canonical(item, memo) for item in value)
+        text: str = f"{type(value).__qualname__}[{items}]"  # keeps NamedTuples apart
+    elif isinstance(value, (set, frozenset)):
+        text = "{" + ",".join(sorted(_canonical(item, memo) for item in value)) + "}"
+    elif isinstance(value, dict):
+        text = _canonical_items(value, memo)
+    elif isinstance(value, CodeType):
+        consts: str = _canonical((value.co_consts, value.co_names), memo)
+        text = f"code[{value.co_code.hex()},{consts}]"
+    elif isinstance(value, FunctionType):
+        # every lambda is called <lambda>: the bytecode, defaults and closure
+        # tell them apart
+        cells: tuple = tuple(cell.cell_contents for cell in value.__closure__ or ())
+        parts: tuple = (value.__code__, value.__defaults__, value.__kwdefaults__, cells)
+        text = value.__qualname__ + _canonical(parts, memo)
+    elif isinstance(value, MethodType):
+        text = "method" + _canonical((value.__func__, value.__self__), memo)
+    elif isinstance(value, partial):
+        text = "partial" + _canonical((value.func, value.args, value.keywords), memo)
+    elif hasattr(value, "__qualname__"):  # classes and builtins
+        text = value.__qualname__
+    elif hasattr(value, "__dict__"):
+        # the parameters of a constraint; underscored attributes are caches
+        public: dict = {k: v for k, v in vars(value).items() if not k.startswith("_")}
+        text = type(value).__qualname__ + _canonical_items(public, memo)
+    else:
+        text = repr(value)
+    # the value is kept with its text: the tuples built above are freed as
+    # soon as they are encoded, and a later object could reuse their id
+    memo[key] = (value, text)
+    return text
+
+
+def _canonical_items(mapping: dict, memo: dict[int, tuple[Any, str]]) -> str:
+    pairs: list[str] = [
+        f"{_canonical(k, memo)}:{_canonical(v, memo)}" for k, v in mapping.items()
+    ]
+    return "{" + ",".join(sorted(pairs)) + "}"
+
+
+def _indices(bitset: int) -> list[int]:
+    indices: list[int] = []
+    while bitset:
+        low: int = bitset & -bitset
+        indices.append(low.bit_length() - 1)
+        bitset ^= low
+    return indices
+
 
 class Constraint(Generic[V, D], ABC):
     def __init__(self, variables: list[V]) -> None:
@@ -14,41 +97,1368 @@ class Constraint(Generic[V, D], ABC):
     def satisfied(self, assignment: dict[V, D]) -> bool:
         raise NotImplementedError("Subclass should implement this")
 
+    def satisfied_delta(self, variable: V, assignment: dict[V, D]) -> bool:
+        """Check the assignment knowing that only `variable` was just assigned.
+
+        The rest of the assignment already satisfied this constraint, so
+        subclasses can restrict the check to what involves `variable`.
+        """
+        return self.satisfied(assignment)
+
+    def pruned_values(
+        self, variable: V, assignment: dict[V, D], neighbor: V
+    ) -> Optional[Iterable[int]]:
+        """Indices into the neighbor's domain that `variable`'s new value rules out.
+
+        Forward checking uses this shortcut when every constraint between the
+        two variables provides it; None makes it test the values one by one.
+        """
+        return None
+
+    def culprits(self, variable: V, assignment: dict[V, D]) -> Iterable[V]:
+        """Assigned variables that rule out `variable`'s value with this constraint.
+
+        Backjumping goes back to the latest of them, so a smaller set skips
+        more of the search; by default every other assigned variable is blamed.
+        """
+        return [v for v in self.variables if v != variable and v in assignment]
+
+    def counter(self, assignment: dict[V, D]) -> "ConflictCounter[V, D]":
+        """Conflict counts for local search over `assignment`.
+
+        The default recounts culprits() for every value; constraints over many
+        variables can return a subclass that keeps its counts incrementally.
+        """
+        return ConflictCounter(self, assignment)
+
+
+class ConflictCounter(Generic[V, D]):
+    """How many assigned variables a value would conflict with, per constraint.
+
+    Local search calls add() after assigning a variable and remove() before
+    unassigning it; conflicts() is asked for unassigned variables only. A
+    variable conflicting with another must conflict with it in return.
+    """
+
+    def __init__(self, constraint: Constraint[V, D], assignment: dict[V, D]) -> None:
+        self.constraint: Constraint[V, D] = constraint
+        self.assignment: dict[V, D] = assignment
+
+    def conflicts(self, variable: V, value: D) -> int:
+        assignment: dict[V, D] = self.assignment
+        assignment[variable] = value
+        count: int = 0
+        if not self.constraint.satisfied_delta(variable, assignment):
+            count = sum(1 for _ in self.constraint.culprits(variable, assignment))
+        del assignment[variable]
+        return count
+
+    def culprits(self, variable: V, value: D) -> Iterable[V]:
+        """The assigned variables counted by conflicts(variable, value)."""
+        assignment: dict[V, D] = self.assignment
+        assignment[variable] = value
+        culprits: list[V] = list(self.constraint.culprits(variable, assignment))
+        del assignment[variable]
+        return culprits
+
+    def hints(self, variable: V) -> Sequence[D]:
+        """Values of the variable to sample first when its domain is too large
+        to try every value, like the rows that no queen uses yet."""
+        return ()
+
+    def add(self, variable: V, value: D) -> None:
+        pass
+
+    def remove(self, variable: V, value: D) -> None:
+        pass
+
+
+class Unassigned(Sequence[V]):
+    """Read-only view of the variables that the search has not assigned yet."""
+
+    def __init__(self, order: list[V]) -> None:
+        self._order: list[V] = order
+        self.start: int = 0
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._order[self.start :][idx]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("Unassigned index out of range")
+        return self._order[self.start + idx]
+
+    def __len__(self) -> int:
+        return len(self._order) - self.start
+
+    def __iter__(self) -> Iterator[V]:
+        return islice(self._order, self.start, None)
+
+
+class Propagation(str, Enum):
+    NONE = "none"
+    FORWARD_CHECKING = "fc"
+    MAC = "mac"  # forward checking + AC-3 over binary constraints
+
+
+class Solver(str, Enum):
+    BACKTRACKING = "backtracking"
+    MIN_CONFLICTS = "min-conflicts"  # local search, see CSP.min_conflicts
+
+
+class Status(str, Enum):
+    FINISHED = "finished"
+    NODE_LIMIT = "node limit"
+    TIMED_OUT = "timed out"
+    CANCELLED = "cancelled"
+
+
+class SolutionStore(Protocol):
+    """Solutions by fingerprint, see cache.SolutionCache."""
+
+    def get(self, key: str, valid: Callable[[dict], bool]) -> Optional[dict]: ...
+
+    def put(self, key: str, solution: dict) -> None: ...
+
+
+class Token(Protocol):
+    """Checked before every value a CSP search tries; parallel.py polls it
+    from the calling process and stops its workers itself."""
+
+    def is_set(self) -> bool: ...
+
+
+@dataclass
+class Budget:
+    """Caps on the values a CSP search tries, on its time and a cancel token.
+
+    A search stops when it has tried `nodes` values, after `seconds`, or once
+    the `cancel` token is set. `best` is the largest consistent partial
+    assignment it reached, so an interrupted search still returns progress.
+    In parallel.py the node cap applies to every subproblem on its own.
+    """
+
+    seconds: Optional[float] = None
+    nodes: Optional[int] = None
+    cancel: Optional[Token] = None
+    status: Status = Status.FINISHED
+    spent: int = 0
+    best: Optional[dict] = None
+    deadline: float = field(default=inf, repr=False)
+
+    def start(self) -> None:
+        self.status = Status.FINISHED
+        self.spent = 0
+        self.best = None
+        self.deadline = inf if self.seconds is None else monotonic() + self.seconds
+
+    def spend(self) -> bool:
+        """Count one node, False once the search should stop."""
+        if self.nodes is not None and self.spent >= self.nodes:
+            self.status = Status.NODE_LIMIT
+        elif self.deadline != inf and monotonic() > self.deadline:
+            self.status = Status.TIMED_OUT
+        elif self.cancel is not None and self.cancel.is_set():
+            self.status = Status.CANCELLED
+        else:
+            self.spent += 1
+            return True
+        return False
+
+    def reach(self, assignment: dict) -> None:
+        if self.best is None or len(assignment) > len(self.best):
+            self.best = dict(assignment)
+
+
+@dataclass
+class SolverStats:
+    """What a CSP search did: values tried, backtracks and backjumps, nogood
+    hits, restarts, pruning and the constraint checks, by constraint class.
+
+    The hooks see every assignment (variable, value, depth), every variable
+    that runs out of values (variable, depth) and every solution; searches
+    called without stats skip all the bookkeeping.
+    """
+
+    nodes: int = 0  # values tried
+    backtracks: int = 0
+    jumps: int = 0  # assigned variables skipped over by backjumping
+    nogood_hits: int = 0  # values rejected by a learned nogood
+    restarts: int = 0
+    pruned: int = 0
+    checks: int = 0  # constraint evaluations, table lookups included
+    max_depth: int = 0
+    solutions: int = 0
+    seconds: float = 0.0
+    # calls to satisfied_delta() and the time they took, per constraint class
+    constraint_calls: dict[str, int] = field(default_factory=dict)
+    constraint_seconds: dict[str, float] = field(default_factory=dict)
+    on_assign: Optional[Callable[[Any, Any, int], None]] = field(
+        default=None, repr=False
+    )
+    on_backtrack: Optional[Callable[[Any, int], None]] = field(default=None, repr=False)
+    on_solution: Optional[Callable[[dict], None]] = field(default=None, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if not f.name.startswith("on_")
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def merge(self, counts: dict[str, Any]) -> None:
+        """Add the as_dict() of another search, as parallel.py does for the
+        stats of every subproblem."""
+        for name, value in counts.items():
+            if name == "max_depth":
+                self.max_depth = max(self.max_depth, value)
+            elif isinstance(value, dict):
+                totals: dict = getattr(self, name)
+                for key, amount in value.items():
+                    totals[key] = totals.get(key, 0) + amount
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def assign(self, variable: Any, value: Any, depth: int) -> None:
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.on_assign is not None:
+            self.on_assign(variable, value, depth)
+
+    def backtrack(self, variable: Any, depth: int) -> None:
+        self.backtracks += 1
+        if self.on_backtrack is not None:
+            self.on_backtrack(variable, depth)
+
+    def record(self, constraint: Constraint, seconds: float) -> None:
+        name: str = type(constraint).__name__
+        self.checks += 1
+        self.constraint_calls[name] = self.constraint_calls.get(name, 0) + 1
+        self.constraint_seconds[name] = self.constraint_seconds.get(name, 0) + seconds
+
 
 class CSP(Generic[V, D]):
-    def __init__(self, variables: list[V], domains: dict[V, list[D]]):
+    def __init__(
+        self, variables: list[V], domains: dict[V, list[D]], compiled: bool = True
+    ):
         self.variables: list[V] = variables
         self.domains: dict[V, list[D]] = domains
         self.constraints: dict[V, list[Constraint[V, D]]] = defaultdict(list)
+        # compatibility tables of the binary constraints: tables[c][x][i] is the
+        # bitset of the indices j of the other variable y for which c accepts
+        # x=domains[x][i], y=domains[y][j]; compiled=False keeps calling
+        # satisfied() to compare against the interpreted path
+        self.compiled: bool = compiled
+        self.tables: dict[Constraint[V, D], dict[V, list[int]]] = {}
+        # the two domains each table was compiled from; a search compiles the
+        # tables again when they no longer match self.domains
+        self.table_domains: dict[Constraint[V, D], tuple[tuple, tuple]] = {}
         for variable in self.variables:
             if variable not in domains:
                 raise LookupError("Every variable should have a domain")
+        # statistics of the last backtracking call
+        self.nodes: int = 0
+        self.pruned: int = 0
+
+    def __getstate__(self) -> dict:
+        # only the problem definition travels to worker processes, the
+        # solver's scratch state is rebuilt by every search
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
 
     def consitent(self, variable: V, assignment: dict[V, D]) -> bool:
         for constraint in self.constraints[variable]:
-            if not constraint.satisfied(assignment):
+            if not constraint.satisfied_delta(variable, assignment):
                 return False
         return True
 
+    def fingerprint(self, assignment: dict[V, D] = {}) -> str:
+        """SHA-256 of the variables, domains, constraint parameters and givens.
+
+        The order of the variables, of the values in a domain and of the
+        constraints does not matter, so the same problem built again, in this
+        process or another, has the same fingerprint.
+        """
+        memo: dict[int, tuple[Any, str]] = {}
+        domains: dict[int, str] = {}
+        for variable in self.variables:
+            domain: list[D] = self.domains[variable]
+            if id(domain) not in domains:
+                values: list[str] = sorted(_canonical(value, memo) for value in domain)
+                # digested, so a domain shared by a million variables is only
+                # encoded once
+                text: str = "{" + ",".join(values) + "}"
+                domains[id(domain)] = hashlib.sha256(text.encode()).hexdigest()
+        parts: list[str] = sorted(
+            f"{_canonical(variable, memo)}={domains[id(self.domains[variable])]}"
+            for variable in self.variables
+        )
+        constraints: dict[int, Constraint[V, D]] = {
+            id(c): c for cs in self.constraints.values() for c in cs
+        }
+        parts += sorted(_canonical(c, memo) for c in constraints.values())
+        parts.append(_canonical_items(assignment, memo))
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def is_solution(self, assignment: dict[V, D]) -> bool:
+        """Every variable has a value of its domain and every constraint holds."""
+        allowed: dict[int, Any] = {}
+        for variable in self.variables:
+            if variable not in assignment:
+                return False
+            domain: list[D] = self.domains[variable]
+            if id(domain) not in allowed:
+                try:
+                    allowed[id(domain)] = set(domain)
+                except TypeError:  # unhashable values
+                    allowed[id(domain)] = domain
+            if assignment[variable] not in allowed[id(domain)]:
+                return False
+        constraints: dict[int, Constraint[V, D]] = {
+            id(c): c for cs in self.constraints.values() for c in cs
+        }
+        return all(
+            c.satisfied({v: assignment[v] for v in c.variables})
+            for c in constraints.values()
+        )
+
     def add_constraint(self, constraint: Constraint[V, D]) -> None:
         for variable in constraint.variables:
-            if variable not in self.variables:
+            if variable not in self.domains:
                 raise LookupError("Variable not constraint not in CSP")
             else:
                 self.constraints[variable].append(constraint)
 
-    def backtracking(self, assignment: dict[V, D] = {}) -> Optional[dict[V, D]]:
-        if len(assignment) == len(self.variables):
-            return assignment
-
-        unassigned: list[V] = [v for v in self.variables if v not in assignment]
-        # we pick the first unassigned variables
-        first: V = unassigned[0]
-        for value in self.domains[first]:
-            local_assignment = assignment.copy()
-            local_assignment[first] = value
-            if self.consitent(first, local_assignment):
-                result: Optional[dict[V, D]] = self.backtracking(local_assignment)
-                if result is not None:
-                    return result
+    def _compile_tables(self) -> None:
+        """Compile the binary constraints whose domains changed, or were never
+        compiled, so that domains may still be edited after add_constraint."""
+        binary: dict[Constraint[V, D], None] = {
+            c: None
+            for cs in self.constraints.values()
+            for c in cs
+            if self.compiled and len(set(c.variables)) == 2
+        }
+        for constraint in list(self.tables):
+            if constraint not in binary:
+                del self.tables[constraint]
+                del self.table_domains[constraint]
+        for constraint in binary:
+            x, y = dict.fromkeys(constraint.variables)
+            domains: tuple[tuple, tuple] = (
+                tuple(self.domains[x]),
+                tuple(self.domains[y]),
+            )
+            if self.table_domains.get(constraint) == domains:
+                continue
+            self.tables.pop(constraint, None)
+            self.table_domains.pop(constraint, None)
+            if len(domains[0]) * len(domains[1]) <= MAX_TABLE_SIZE:
+                self.tables[constraint] = self._compile(constraint, x, y)
+                self.table_domains[constraint] = domains
+
+    def _compile(self, constraint: Constraint[V, D], x: V, y: V) -> dict[V, list[int]]:
+        rows: list[int] = [0] * len(self.domains[x])
+        columns: list[int] = [0] * len(self.domains[y])
+        for i, a in enumerate(self.domains[x]):
+            for j, b in enumerate(self.domains[y]):
+                if constraint.satisfied({x: a, y: b}):
+                    rows[i] |= 1 << j
+                    columns[j] |= 1 << i
+        return {x: rows, y: columns}
+
+    def backtracking(
+        self,
+        assignment: dict[V, D] = {},
+        propagation: Union[Propagation, str] = Propagation.NONE,
+        select_variable: Optional["VariableSelector"] = None,
+        order_values: Optional["ValueOrderer"] = None,
+        stats: Optional[SolverStats] = None,
+        budget: Optional[Budget] = None,
+        backjumping: bool = False,
+        nogoods: int = 0,
+        seed: Optional[int] = None,
+        restarts: Optional[Iterable[int]] = None,
+    ) -> Optional[dict[V, D]]:
+        """The first solution found, None if there is none or the budget ran out.
+
+        `restarts` is a schedule of node limits, like luby() or geometric():
+        each run gives up at its limit and the next one starts over with new
+        random tie-breaking. The seed of every run is drawn from `seed`, so a
+        whole sequence of runs can be replayed.
+        """
+        if restarts is not None:
+            return self._restarting(
+                assignment,
+                restarts,
+                seed,
+                stats,
+                budget,
+                propagation=propagation,
+                select_variable=select_variable,
+                order_values=order_values,
+                backjumping=backjumping,
+                nogoods=nogoods,
+            )
+        return next(
+            self.solutions(
+                assignment,
+                propagation,
+                select_variable,
+                order_values,
+                stats=stats,
+                budget=budget,
+                backjumping=backjumping,
+                nogoods=nogoods,
+                seed=seed,
+            ),
+            None,
+        )
+
+    def _restarting(
+        self,
+        assignment: dict[V, D],
+        restarts: Iterable[int],
+        seed: Optional[int],
+        stats: Optional[SolverStats],
+        budget: Optional[Budget],
+        **options: Any,
+    ) -> Optional[dict[V, D]]:
+        seeds: random.Random = random.Random(seed)
+        if budget is not None:
+            budget.start()
+        nodes: int = 0
+        try:
+            for run, limit in enumerate(restarts):
+                seconds: Optional[float] = None
+                cancel: Optional[Token] = None
+                if budget is not None:
+                    if budget.nodes is not None:
+                        if budget.spent >= budget.nodes:
+                            budget.status = Status.NODE_LIMIT
+                            return None
+                        limit = min(limit, budget.nodes - budget.spent)
+                    if budget.deadline != inf:
+                        seconds = budget.deadline - monotonic()
+                    cancel = budget.cancel
+                if stats is not None and run:
+                    stats.restarts += 1
+                attempt: Budget = Budget(seconds, limit, cancel)
+                solution: Optional[dict[V, D]] = next(
+                    self.solutions(
+                        assignment,
+                        stats=stats,
+                        budget=attempt,
+                        seed=seeds.randrange(2**32),
+                        **options,
+                    ),
+                    None,
+                )
+                nodes += self.nodes
+                if budget is not None:
+                    budget.spent += attempt.spent
+                    if attempt.best is not None:
+                        budget.reach(attempt.best)
+                if solution is not None:
+                    return solution
+                if attempt.status is not Status.NODE_LIMIT:
+                    # searched to the end without a solution, or out of time
+                    if budget is not None:
+                        budget.status = attempt.status
+                    return None
+            if budget is not None:
+                budget.status = Status.NODE_LIMIT
+            return None
+        finally:
+            self.nodes = nodes
+
+    def solutions(
+        self,
+        assignment: dict[V, D] = {},
+        propagation: Union[Propagation, str] = Propagation.NONE,
+        select_variable: Optional["VariableSelector"] = None,
+        order_values: Optional["ValueOrderer"] = None,
+        limit: Optional[int] = None,
+        stats: Optional[SolverStats] = None,
+        budget: Optional[Budget] = None,
+        backjumping: bool = False,
+        nogoods: int = 0,
+        seed: Optional[int] = None,
+    ) -> Iterator[dict[V, D]]:
+        """Lazily yield every solution, at most `limit` of them.
+
+        With `backjumping` a variable left without values jumps back to the
+        latest variable responsible for its failures instead of the previous
+        one, and the `nogoods` most recently used failing combinations are
+        remembered so that the search rejects them on sight. A `seed` breaks
+        the ties of the heuristics at random, the same way for the same seed.
+        """
+        found: Iterator[dict[V, D]] = self._solve(
+            assignment,
+            propagation,
+            select_variable,
+            order_values,
+            stats,
+            budget,
+            backjumping,
+            nogoods,
+            seed,
+        )
+        for solution in islice(found, limit):
+            yield dict(solution)
+
+    def count_solutions(
+        self,
+        assignment: dict[V, D] = {},
+        propagation: Union[Propagation, str] = Propagation.NONE,
+        select_variable: Optional["VariableSelector"] = None,
+        order_values: Optional["ValueOrderer"] = None,
+        limit: Optional[int] = None,
+        stats: Optional[SolverStats] = None,
+        budget: Optional[Budget] = None,
+        backjumping: bool = False,
+        nogoods: int = 0,
+        seed: Optional[int] = None,
+    ) -> int:
+        """Count the solutions (up to `limit`) without building result dicts."""
+        found: Iterator[dict[V, D]] = self._solve(
+            assignment,
+            propagation,
+            select_variable,
+            order_values,
+            stats,
+            budget,
+            backjumping,
+            nogoods,
+            seed,
+        )
+        return sum(1 for _ in islice(found, limit))
+
+    def solve(
+        self,
+        assignment: dict[V, D] = {},
+        solver: Union[Solver, str] = Solver.BACKTRACKING,
+        cache: Optional[SolutionStore] = None,
+        **options: Any,
+    ) -> Optional[dict[V, D]]:
+        """First solution of the chosen solver, the options are passed on to it.
+
+        With a cache the solution is first looked up by the fingerprint of
+        the problem and the givens, and a cached solution is only returned if
+        it still solves this CSP; new solutions are stored in the cache.
+        """
+        if cache is not None:
+            key: str = self.fingerprint(assignment)
+            cached: Optional[dict[V, D]] = cache.get(
+                key,
+                lambda solution: self.is_solution(solution)
+                and all(solution[v] == value for v, value in assignment.items()),
+            )
+            if cached is not None:
+                return cached
+        if Solver(solver) is Solver.MIN_CONFLICTS:
+            result: Optional[dict[V, D]] = self.min_conflicts(assignment, **options)
+        else:
+            result = self.backtracking(assignment, **options)
+        if cache is not None and result is not None:
+            cache.put(key, result)
+        return result
+
+    def min_conflicts(
+        self,
+        assignment: dict[V, D] = {},
+        max_steps: Optional[int] = None,
+        restarts: int = 10,
+        tabu: int = 2,
+        candidates: int = 100,
+        seed: Optional[int] = None,
+        stats: Optional[SolverStats] = None,
+        budget: Optional[Budget] = None,
+    ) -> Optional[dict[V, D]]:
+        """Local search: repair one conflicted variable at a time.
+
+        Every try starts from a greedy assignment, then moves a random variable
+        still in conflict to its least conflicting other value; domains larger
+        than `candidates` are sampled. Values left in the last `tabu` moves are
+        only taken back when they remove every conflict. After `max_steps`
+        moves (by default 20 per variable, at least 10,000) the search starts
+        over, at most `restarts` times. None means that no solution was found,
+        not that there is none.
+        """
+        rng: random.Random = random.Random(seed)
+        if budget is not None:
+            budget.start()
+        started: float = perf_counter()
+        self.nodes = 0
+        free: list[V] = [v for v in self.variables if v not in assignment]
+        if max_steps is None:
+            max_steps = max(10_000, 20 * len(free))
+        try:
+            for attempt in range(restarts + 1):
+                if stats is not None and attempt:
+                    stats.restarts += 1
+                solution: Optional[dict[V, D]] = self._repair(
+                    assignment, free, max_steps, tabu, candidates, rng, budget
+                )
+                if solution is not None:
+                    if stats is not None:
+                        stats.solutions += 1
+                        if stats.on_solution is not None:
+                            stats.on_solution(solution)
+                    return solution
+                if budget is not None and budget.status is not Status.FINISHED:
+                    return None
+            return None
+        finally:
+            if stats is not None:
+                stats.nodes += self.nodes
+                stats.seconds += perf_counter() - started
+
+    def _repair(
+        self,
+        assignment: dict[V, D],
+        free: list[V],
+        max_steps: int,
+        tabu: int,
+        candidates: int,
+        rng: random.Random,
+        budget: Optional[Budget],
+    ) -> Optional[dict[V, D]]:
+        current: dict[V, D] = dict(assignment)
+        counters: dict[Constraint[V, D], ConflictCounter[V, D]] = {}
+        watching: dict[V, list[ConflictCounter[V, D]]] = {}
+        # variables under a single constraint share the list of its counter
+        alone: dict[Constraint[V, D], list[ConflictCounter[V, D]]] = {}
+        for variable in free:
+            constraints: list[Constraint[V, D]] = self.constraints[variable]
+            for constraint in constraints:
+                if constraint not in counters:
+                    counters[constraint] = constraint.counter(current)
+            if len(constraints) == 1:
+                if constraints[0] not in alone:
+                    alone[constraints[0]] = [counters[constraints[0]]]
+                watching[variable] = alone[constraints[0]]
+            else:
+                watching[variable] = [counters[c] for c in constraints]
+        # the last step at which a (variable, value) just left is forbidden
+        forbidden: dict[tuple[V, D], int] = {}
+        step: int = 0
+        uniform: Callable[[], float] = rng.random
+
+        def score(variable: V, value: D) -> int:
+            total: int = 0
+            for counter in watching[variable]:
+                total += counter.conflicts(variable, value)
+            return total
+
+        def choose(variable: V) -> tuple[D, int]:
+            # a least conflicting value, ties broken at random; larger domains
+            # are sampled, half of the samples coming from the counters' hints
+            domain: list[D] = self.domains[variable]
+            watched: list[ConflictCounter[V, D]] = watching[variable]
+            exhaustive: bool = len(domain) <= candidates
+            values: list[D] = rng.sample(domain, len(domain)) if exhaustive else []
+            hints: list[Sequence[D]] = []
+            if not exhaustive:
+                hints = [h for h in (c.hints(variable) for c in watched) if h]
+            hinted: int = min(candidates // 2, sum(map(len, hints)))
+            best: Optional[D] = None
+            best_score: float = inf
+            ties: int = 0
+            fallback: D = domain[0]
+            fallback_score: float = inf
+            for i in range(len(domain) if exhaustive else candidates):
+                value: D
+                if exhaustive:
+                    value = values[i]
+                elif i < hinted:
+                    suggested: Sequence[D] = hints[i % len(hints)]
+                    value = suggested[int(uniform() * len(suggested))]
+                else:
+                    value = domain[int(uniform() * len(domain))]
+                conflicts: int
+                if len(watched) == 1:
+                    conflicts = watched[0].conflicts(variable, value)
+                else:
+                    conflicts = score(variable, value)
+                if conflicts == 0:
+                    return value, 0
+                if conflicts < fallback_score:
+                    fallback, fallback_score = value, conflicts
+                if (
+                    conflicts > best_score
+                    or forbidden.get((variable, value), -1) >= step
+                ):
+                    continue
+                if conflicts < best_score:
+                    best, best_score, ties = value, conflicts, 1
+                else:
+                    ties += 1
+                    if rng.randrange(ties) == 0:
+                        best = value
+            if best is None:  # every candidate is tabu
+                return fallback, int(fallback_score)
+            return best, int(best_score)
+
+        def place(variable: V, value: D) -> None:
+            current[variable] = value
+            for counter in watching[variable]:
+                counter.add(variable, value)
+
+        def lift(variable: V) -> D:
+            value: D = current.pop(variable)
+            for counter in watching[variable]:
+                counter.remove(variable, value)
+            return value
+
+        # every variable in conflict is in `conflicted`, the ones that lost
+        # their conflicts since are dropped when they are picked
+        conflicted: list[V] = []
+        position: dict[V, int] = {}
+
+        def mark(variable: V) -> None:
+            if variable not in position:
+                position[variable] = len(conflicted)
+                conflicted.append(variable)
+
+        def unmark(variable: V) -> None:
+            idx: int = position.pop(variable)
+            last: V = conflicted.pop()
+            if last != variable:
+                conflicted[idx] = last
+                position[last] = idx
+
+        def settle(variable: V, value: D, conflicts: int) -> None:
+            if conflicts:
+                mark(variable)
+                for counter in watching[variable]:
+                    for other in counter.culprits(variable, value):
+                        if other in watching:
+                            mark(other)
+            elif variable in position:
+                unmark(variable)
+            place(variable, value)
+
+        order: list[V] = list(free)
+        rng.shuffle(order)
+        for variable in order:
+            watched: list[ConflictCounter[V, D]] = watching[variable]
+            if len(watched) == 1:  # try the hints alone first, it is the usual case
+                counter: ConflictCounter[V, D] = watched[0]
+                hints: Sequence[D] = counter.hints(variable)
+                for _ in range(min(len(hints), candidates // 2)):
+                    value = hints[int(uniform() * len(hints))]
+                    if not counter.conflicts(variable, value):
+                        current[variable] = value
+                        counter.add(variable, value)
+                        break
+                else:
+                    value, conflicts = choose(variable)
+                    settle(variable, value, conflicts)
+                continue
+            value, conflicts = choose(variable)
+            settle(variable, value, conflicts)
+
+        while True:
+            if not conflicted:
+                return current
+            if step == max_steps:
+                return None
+            if budget is not None and not budget.spend():
+                return None
+            step += 1
+            self.nodes += 1
+            variable = conflicted[rng.randrange(len(conflicted))]
+            old: D = lift(variable)
+            forbidden[variable, old] = step + tabu
+            value, conflicts = choose(variable)
+            settle(variable, value, conflicts)
+
+    def _solve(
+        self,
+        assignment: dict[V, D],
+        propagation: Union[Propagation, str],
+        select_variable: Optional["VariableSelector"],
+        order_values: Optional["ValueOrderer"],
+        stats: Optional[SolverStats] = None,
+        budget: Optional[Budget] = None,
+        backjumping: bool = False,
+        nogoods: int = 0,
+        seed: Optional[int] = None,
+    ) -> Iterator[dict[V, D]]:
+        self._propagation: Propagation = Propagation(propagation)
+        self._select_variable = select_variable or first_unassigned
+        self._order_values = order_values or domain_order
+        self._stats: Optional[SolverStats] = stats
+        self._budget: Optional[Budget] = budget
+        self._backjumping: bool = backjumping
+        self._max_nogoods: int = nogoods if backjumping else 0
+        self._rng: Optional[random.Random] = (
+            None if seed is None else random.Random(seed)
+        )
+        if budget is not None:
+            budget.start()
+        self.nodes = 0
+        self.pruned = 0
+        if stats is None:
+            yield from self._start(assignment)
+            return
+
+        # the time spent by the caller between two solutions is not counted
+        started: Optional[float] = perf_counter()
+        pruned: int = 0
+        try:
+            for solution in self._start(assignment):
+                stats.solutions += 1
+                stats.seconds += perf_counter() - started
+                stats.pruned += self.pruned - pruned
+                pruned = self.pruned
+                if stats.on_solution is not None:
+                    stats.on_solution(solution)
+                started = None
+                yield solution
+                started = perf_counter()
+        finally:
+            if started is not None:
+                stats.seconds += perf_counter() - started
+            stats.pruned += self.pruned - pruned
+
+    def _start(self, assignment: dict[V, D]) -> Iterator[dict[V, D]]:
+        self._init_domains()
+        assignment = assignment.copy()
+        for variable, value in assignment.items():
+            if value in self.domains[variable]:
+                self._assigned[variable] = self.domains[variable].index(value)
+            elif any(variable in tables for tables in self.tables.values()):
+                raise LookupError("Compiled constraints need values from the domains")
+        if self._propagation is not Propagation.NONE:
+            for variable in assignment:
+                if not self._forward_check(variable, assignment):
+                    return
+            if self._propagation is Propagation.MAC and not self._ac3(assignment):
+                return
+        yield from self._search(assignment)
+
+    def _search(self, assignment: dict[V, D]) -> Iterator[dict[V, D]]:
+        # the solver's own assignment is yielded for every solution, callers
+        # must copy it before resuming the search
+        # unassigned variables live at the tail of `order`, from unassigned.start
+        # onwards; selecting a variable swaps it to the front of the tail, so
+        # assigning and unassigning it are O(1) and the stack restores the order
+        order: list[V] = [v for v in self.variables if v not in assignment]
+        if self._rng is not None:  # ties between variables go by this order
+            self._rng.shuffle(order)
+        position: dict[V, int] = {v: i for i, v in enumerate(order)}
+        unassigned: Unassigned[V] = Unassigned(order)
+        if not order:
+            yield assignment
+            return
+
+        def swap(i: int, j: int) -> None:
+            order[i], order[j] = order[j], order[i]
+            position[order[i]] = i
+            position[order[j]] = j
+
+        def push() -> None:
+            variable: V = self._select_variable(self, unassigned, assignment)
+            idx: int = position[variable]
+            swap(idx, unassigned.start)
+            unassigned.start += 1
+            values: Iterator[int] = iter(self._order_values(self, variable, assignment))
+            stack.append((variable, idx, values, len(self._trail)))
+            if jumping:
+                depth[variable] = len(stack) - 1
+                conflicts.append(set())
+
+        def pop(idx: int) -> None:
+            stack.pop()
+            unassigned.start -= 1
+            swap(idx, unassigned.start)
+
+        stats: Optional[SolverStats] = self._stats
+        budget: Optional[Budget] = self._budget
+        stack: list[tuple[V, int, Iterator[int], int]] = []
+        # backjumping: the assigned variables that ruled out values of each
+        # frame, the stack index of every assigned variable, and how many
+        # frames at the bottom hold the values of the last solution found (a
+        # solution is no conflict, so these frames backtrack chronologically)
+        jumping: bool = self._backjumping
+        learning: bool = self._max_nogoods > 0
+        conflicts: list[set[V]] = []
+        depth: dict[V, int] = {}
+        pinned: int = 0
+        push()
+        while stack:
+            variable, idx, values, mark = stack[-1]
+            if variable in assignment:  # coming back from the previous value
+                del assignment[variable]
+                self._undo(mark)
+            live: list[bool] = self._live[variable]
+            for value_idx in values:
+                if live[value_idx]:
+                    break
+            else:
+                pop(idx)
+                if stats is not None:
+                    stats.backtrack(variable, unassigned.start)
+                if jumping and len(stack) >= pinned:
+                    # no value works until the latest variable of the conflict
+                    # changes: skip the frames above it, which inherits the rest
+                    # the values pruned before they were tried count as well
+                    conflict: set[V] = conflicts.pop()
+                    conflict |= self._pruned_culprits(variable, assignment)
+                    self._learn(conflict)
+                    target: int = max(
+                        (depth[v] for v in conflict if v in depth), default=-1
+                    )
+                    while len(stack) > target + 1:
+                        skipped, skipped_idx, _, _ = stack[-1]
+                        del assignment[skipped]
+                        pop(skipped_idx)
+                        conflicts.pop()
+                        if stats is not None:
+                            stats.jumps += 1
+                    if stack:
+                        conflict.discard(stack[-1][0])
+                        conflicts[-1].update(conflict)
+                elif jumping:
+                    conflicts.pop()
+                pinned = min(pinned, len(stack))
+                continue
+
+            if budget is not None and not budget.spend():
+                return
+            self.nodes += 1
+            assignment[variable] = self.domains[variable][value_idx]
+            self._assigned[variable] = value_idx
+            if stats is not None:
+                stats.assign(variable, assignment[variable], unassigned.start)
+            if learning:
+                learned: Optional[frozenset] = self._nogood(
+                    variable, value_idx, assignment
+                )
+                if learned is not None:
+                    conflicts[-1].update(u for u, _ in learned if u != variable)
+                    if stats is not None:
+                        stats.nogood_hits += 1
+                    del assignment[variable]
+                    continue
+            failed: Optional[Constraint[V, D]] = self._violated(
+                variable, value_idx, assignment
+            )
+            if failed is not None:
+                self._weights[failed] += 1
+                if jumping:
+                    conflicts[-1].update(failed.culprits(variable, assignment))
+                del assignment[variable]
+                continue
+            if not self._propagate(variable, assignment):
+                if jumping:
+                    conflicts[-1].update(self._wipeout_culprits(variable, assignment))
+                continue
+            if budget is not None:
+                budget.reach(assignment)
+            if unassigned.start == len(order):
+                pinned = len(stack)
+                yield assignment
+                continue
+            push()
+
+    def _propagate(self, variable: V, assignment: dict[V, D]) -> bool:
+        if self._propagation is Propagation.NONE:
+            return True
+        self._wiped_out = None
+        if not self._forward_check(variable, assignment):
+            return False
+        return self._propagation is not Propagation.MAC or self._ac3(
+            assignment, variable
+        )
+
+    def _violated(
+        self, variable: V, idx: int, assignment: dict[V, D]
+    ) -> Optional[Constraint[V, D]]:
+        """The first constraint broken by variable=domains[variable][idx], if any."""
+        if self._stats is not None:
+            return self._violated_counted(variable, idx, assignment)
+        for other, table, constraint in self._lookups[variable]:
+            if other in assignment and not table[idx] >> self._assigned[other] & 1:
+                return constraint
+        for constraint in self._interpreted[variable]:
+            if not constraint.satisfied_delta(variable, assignment):
+                return constraint
         return None
+
+    def _pruned_culprits(self, variable: V, assignment: dict[V, D]) -> set[V]:
+        """The assigned variables that pruned values of the unassigned variable.
+
+        Forward checking only removes values that break a constraint with the
+        assigned variables, so each pruned value has culprits; values removed
+        by AC-3 have none in sight and then every assigned variable is blamed.
+        """
+        culprits: set[V] = set()
+        live: list[bool] = self._live[variable]
+        if self._sizes[variable] == len(live):
+            return culprits
+        for idx, value in enumerate(self.domains[variable]):
+            if live[idx]:
+                continue
+            assignment[variable] = value
+            self._assigned[variable] = idx
+            failed: Optional[Constraint[V, D]] = self._violated(
+                variable, idx, assignment
+            )
+            if failed is None:
+                culprits.update(assignment)
+                break
+            culprits.update(failed.culprits(variable, assignment))
+        del assignment[variable]
+        culprits.discard(variable)
+        return culprits
+
+    def _wipeout_culprits(self, variable: V, assignment: dict[V, D]) -> set[V]:
+        """The assigned variables that left a neighbor of `variable` without values."""
+        neighbor: Optional[V] = self._wiped_out
+        if neighbor is None:  # AC-3 failed, blame everything
+            culprits: set[V] = set(assignment)
+        else:
+            culprits = self._pruned_culprits(neighbor, assignment)
+        culprits.discard(variable)
+        return culprits
+
+    def _learn(self, conflict: set[V]) -> None:
+        # the current values of the conflict's variables cannot be extended to
+        # a solution; the nogood is indexed by each of its (variable, value)
+        if not self._max_nogoods or not conflict:
+            return
+        nogood: frozenset[tuple[V, int]] = frozenset(
+            (v, self._assigned[v]) for v in conflict
+        )
+        if nogood in self._nogoods:
+            self._nogoods.move_to_end(nogood)
+            return
+        self._nogoods[nogood] = None
+        for pair in nogood:
+            self._watches[pair].append(nogood)
+        if len(self._nogoods) > self._max_nogoods:
+            evicted, _ = self._nogoods.popitem(last=False)
+            for pair in evicted:
+                self._watches[pair].remove(evicted)
+
+    def _nogood(
+        self, variable: V, idx: int, assignment: dict[V, D]
+    ) -> Optional[frozenset[tuple[V, int]]]:
+        """A learned nogood that variable=domains[variable][idx] completes."""
+        assigned: dict[V, int] = self._assigned
+        for nogood in self._watches.get((variable, idx), ()):
+            if all(
+                v == variable or (v in assignment and assigned[v] == i)
+                for v, i in nogood
+            ):
+                self._nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+    def _violated_counted(
+        self, variable: V, idx: int, assignment: dict[V, D]
+    ) -> Optional[Constraint[V, D]]:
+        stats: SolverStats = self._stats
+        for other, table, constraint in self._lookups[variable]:
+            if other in assignment:
+                stats.checks += 1
+                if not table[idx] >> self._assigned[other] & 1:
+                    return constraint
+        for constraint in self._interpreted[variable]:
+            started: float = perf_counter()
+            satisfied: bool = constraint.satisfied_delta(variable, assignment)
+            stats.record(constraint, perf_counter() - started)
+            if not satisfied:
+                return constraint
+        return None
+
+    def domain_size(self, variable: V) -> int:
+        """Number of values left in the variable's live domain."""
+        return self._sizes[variable]
+
+    def live_values(self, variable: V) -> list[int]:
+        """Indices (into self.domains[variable]) of the values not pruned yet."""
+        live: list[bool] = self._live[variable]
+        if self._permutation is None:
+            return [i for i, alive in enumerate(live) if alive]
+        return [i for i in self._permutation[variable] if live[i]]
+
+    def degree(self, variable: V, assignment: dict[V, D]) -> int:
+        return sum(n not in assignment for n in self._neighbors[variable])
+
+    def ruled_out(self, variable: V, idx: int, assignment: dict[V, D]) -> int:
+        """Count the live neighbor values that variable=domain[idx] conflicts with."""
+        local_assignment = assignment.copy()
+        local_assignment[variable] = self.domains[variable][idx]
+        self._assigned[variable] = idx
+        count: int = 0
+        for neighbor in self._neighbors[variable]:
+            if neighbor in assignment:
+                continue
+            for i in self.live_values(neighbor):
+                local_assignment[neighbor] = self.domains[neighbor][i]
+                count += self._violated(neighbor, i, local_assignment) is not None
+            del local_assignment[neighbor]
+        return count
+
+    def weighted_degree(self, variable: V, assignment: dict[V, D]) -> int:
+        return sum(
+            self._weights[c]
+            for c in self.constraints[variable]
+            if any(v != variable and v not in assignment for v in c.variables)
+        )
+
+    def _init_domains(self) -> None:
+        self._compile_tables()
+        # live domains are flags over the indices of self.domains, pruned values
+        # are pushed to the trail so that backtracking can restore them
+        self._live: dict[V, list[bool]] = {
+            v: [True] * len(self.domains[v]) for v in self.variables
+        }
+        self._sizes: dict[V, int] = {v: len(self.domains[v]) for v in self.variables}
+        # with a seed the values of every domain are tried in a random order
+        self._permutation: Optional[dict[V, list[int]]] = None
+        if self._rng is not None:
+            self._permutation = {
+                v: self._rng.sample(range(size), size)
+                for v, size in self._sizes.items()
+            }
+        self._trail: list[tuple[V, int]] = []
+        # domain index of every assigned value, for the table lookups
+        self._assigned: dict[V, int] = {}
+        # the neighbor whose domain the last failed propagation emptied
+        self._wiped_out: Optional[V] = None
+        # learned nogoods, least recently used first, and the nogoods that
+        # contain each (variable, value index)
+        self._nogoods: OrderedDict[frozenset[tuple[V, int]], None] = OrderedDict()
+        self._watches: dict[tuple[V, int], list[frozenset[tuple[V, int]]]] = (
+            defaultdict(list)
+        )
+        # constraint weights for dom/wdeg, bumped whenever a constraint fails
+        self._weights: dict[Constraint[V, D], int] = defaultdict(lambda: 1)
+        self._neighbors: dict[V, list[V]] = {}
+        # the constraints each variable shares with each of its neighbors
+        self._shared: dict[V, dict[V, list[Constraint[V, D]]]] = {}
+        self._arcs: dict[V, list[tuple[V, Constraint[V, D]]]] = defaultdict(list)
+        # per variable, the compiled constraints as (other variable, table row
+        # per value, constraint) and the constraints left to satisfied_delta()
+        self._lookups: dict[V, list[tuple[V, list[int], Constraint[V, D]]]] = {}
+        self._interpreted: dict[V, list[Constraint[V, D]]] = {}
+        for variable in self.variables:
+            self._lookups[variable] = []
+            self._interpreted[variable] = []
+            shared: dict[V, list[Constraint[V, D]]] = defaultdict(list)
+            for constraint in self.constraints[variable]:
+                tables: Optional[dict[V, list[int]]] = self.tables.get(constraint)
+                if tables is None:
+                    self._interpreted[variable].append(constraint)
+                else:
+                    other = next(v for v in tables if v != variable)
+                    self._lookups[variable].append(
+                        (other, tables[variable], constraint)
+                    )
+                for other in dict.fromkeys(constraint.variables):
+                    if other != variable:
+                        shared[other].append(constraint)
+                if len(set(constraint.variables)) == 2:
+                    other = next(v for v in constraint.variables if v != variable)
+                    self._arcs[variable].append((other, constraint))
+            self._shared[variable] = dict(shared)
+            self._neighbors[variable] = list(shared)
+
+    def _prune(self, variable: V, idx: int) -> None:
+        self._live[variable][idx] = False
+        self._sizes[variable] -= 1
+        self._trail.append((variable, idx))
+        self.pruned += 1
+
+    def _undo(self, mark: int) -> None:
+        while len(self._trail) > mark:
+            variable, idx = self._trail.pop()
+            self._live[variable][idx] = True
+            self._sizes[variable] += 1
+
+    def _forward_check(self, variable: V, assignment: dict[V, D]) -> bool:
+        for neighbor, shared in self._shared[variable].items():
+            if neighbor in assignment:
+                continue
+            live: list[bool] = self._live[neighbor]
+            last_failed: Optional[Constraint[V, D]] = None
+            ruled_out: Optional[list[tuple[Constraint[V, D], Iterable[int]]]] = (
+                self._ruled_out(variable, assignment, neighbor, shared)
+            )
+            if ruled_out is not None:
+                for constraint, values in ruled_out:
+                    for idx in values:
+                        if live[idx]:
+                            self._prune(neighbor, idx)
+                            last_failed = constraint
+            else:
+                for idx, value in enumerate(self.domains[neighbor]):
+                    if not live[idx]:
+                        continue
+                    assignment[neighbor] = value
+                    failed: Optional[Constraint[V, D]] = self._violated(
+                        neighbor, idx, assignment
+                    )
+                    if failed is not None:
+                        self._prune(neighbor, idx)
+                        last_failed = failed
+                    del assignment[neighbor]
+            if self._sizes[neighbor] == 0:
+                self._weights[last_failed] += 1
+                self._wiped_out = neighbor
+                return False
+        return True
+
+    def _ruled_out(
+        self,
+        variable: V,
+        assignment: dict[V, D],
+        neighbor: V,
+        shared: list[Constraint[V, D]],
+    ) -> Optional[list[tuple[Constraint[V, D], Iterable[int]]]]:
+        # only usable when every constraint between the two provides the shortcut
+        ruled_out: list[tuple[Constraint[V, D], Iterable[int]]] = []
+        for constraint in shared:
+            tables: Optional[dict[V, list[int]]] = self.tables.get(constraint)
+            if tables is not None:
+                allowed: int = tables[variable][self._assigned[variable]]
+                values: Optional[Iterable[int]] = _indices(
+                    ~allowed & ((1 << len(self.domains[neighbor])) - 1)
+                )
+            else:
+                values = constraint.pruned_values(variable, assignment, neighbor)
+            if values is None:
+                return None
+            ruled_out.append((constraint, values))
+        return ruled_out
+
+    def _ac3(self, assignment: dict[V, D], variable: Optional[V] = None) -> bool:
+        if variable is None:
+            queue = deque((x, y, c) for x in self.variables for y, c in self._arcs[x])
+        else:
+            queue = deque((x, variable, c) for x, c in self._arcs[variable])
+        while queue:
+            x, y, constraint = queue.popleft()
+            if x in assignment:
+                continue
+            if self._revise(x, y, constraint, assignment):
+                if self._sizes[x] == 0:
+                    self._weights[constraint] += 1
+                    return False
+                queue.extend((z, x, c) for z, c in self._arcs[x] if z != y)
+        return True
+
+    def _revise(
+        self, x: V, y: V, constraint: Constraint[V, D], assignment: dict[V, D]
+    ) -> bool:
+        tables: Optional[dict[V, list[int]]] = self.tables.get(constraint)
+        if tables is not None:
+            return self._revise_table(x, y, tables[x], assignment)
+        if y in assignment:
+            supports: list[D] = [assignment[y]]
+        else:
+            live_y: list[bool] = self._live[y]
+            supports = [v for i, v in enumerate(self.domains[y]) if live_y[i]]
+        revised: bool = False
+        live_x: list[bool] = self._live[x]
+        for idx, value in enumerate(self.domains[x]):
+            if live_x[idx] and not any(
+                constraint.satisfied({x: value, y: support}) for support in supports
+            ):
+                self._prune(x, idx)
+                revised = True
+        return revised
+
+    def _revise_table(
+        self, x: V, y: V, table: list[int], assignment: dict[V, D]
+    ) -> bool:
+        if y in assignment:
+            supports: int = 1 << self._assigned[y]
+        else:
+            supports = 0
+            for idx, alive in enumerate(self._live[y]):
+                if alive:
+                    supports |= 1 << idx
+        revised: bool = False
+        live_x: list[bool] = self._live[x]
+        for idx, row in enumerate(table):
+            if live_x[idx] and not row & supports:
+                self._prune(x, idx)
+                revised = True
+        return revised
+
+
+VariableSelector = Callable[[CSP[V, D], Sequence[V], dict[V, D]], V]
+ValueOrderer = Callable[[CSP[V, D], V, dict[V, D]], list[int]]
+
+
+def first_unassigned(
+    csp: CSP[V, D], unassigned: Sequence[V], assignment: dict[V, D]
+) -> V:
+    return unassigned[0]
+
+
+def minimum_remaining_values(
+    csp: CSP[V, D], unassigned: Sequence[V], assignment: dict[V, D]
+) -> V:
+    return min(unassigned, key=csp.domain_size)
+
+
+def mrv_degree(csp: CSP[V, D], unassigned: Sequence[V], assignment: dict[V, D]) -> V:
+    # ties on the domain size go to the most constraining variable
+    return min(
+        unassigned,
+        key=lambda v: (csp.domain_size(v), -csp.degree(v, assignment)),
+    )
+
+
+def dom_wdeg(csp: CSP[V, D], unassigned: Sequence[V], assignment: dict[V, D]) -> V:
+    return min(
+        unassigned,
+        key=lambda v: csp.domain_size(v) / (csp.weighted_degree(v, assignment) or 1),
+    )
+
+
+def luby(unit: int = 100) -> Iterator[int]:
+    """Node limits unit * 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ... for restarts.
+
+    Within a constant factor of the best fixed schedule for any run-time
+    distribution, without knowing it (Luby, Sinclair and Zuckerman).
+    """
+    u, v = 1, 1
+    while True:
+        yield unit * v
+        if u & -u == v:
+            u, v = u + 1, 1
+        else:
+            v *= 2
+
+
+def geometric(unit: int = 100, factor: float = 1.5) -> Iterator[int]:
+    """Node limits growing by `factor` from `unit`, for restarts."""
+    limit: float = unit
+    while True:
+        yield int(limit)
+        limit *= factor
+
+
+def domain_order(csp: CSP[V, D], variable: V, assignment: dict[V, D]) -> list[int]:
+    return csp.live_values(variable)
+
+
+def least_constraining_value(
+    csp: CSP[V, D], variable: V, assignment: dict[V, D]
+) -> list[int]:
+    """Try first the values that rule out the fewest choices of the neighbors."""
+    return sorted(
+        csp.live_values(variable),
+        key=lambda idx: csp.ruled_out(variable, idx, assignment),
+    )
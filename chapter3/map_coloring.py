@@ -1,4 +1,7 @@
-from typing import Optional
+from collections import deque
+from heapq import heapify, heappop, heappush
+from typing import Iterable, Optional
+
 from csp import CSP, Constraint
 
 
@@ -14,8 +17,232 @@ class MapColoringConstraint(Constraint[str, str]):
         return assignment[self.place1] != assignment[self.place2]
 
 
+def _is_weight(token: str) -> bool:
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+class Graph:
+    """Regions as integer ids 0..n-1 with one adjacency list per region."""
+
+    def __init__(self, names: list[str], adjacency: list[list[int]]) -> None:
+        self.names: list[str] = names
+        self.adjacency: list[list[int]] = adjacency
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[str, ...]]) -> "Graph":
+        ids: dict[str, int] = {}
+        neighbors: list[set[int]] = []
+        for edge in edges:
+            for name in edge:
+                if name not in ids:
+                    ids[name] = len(ids)
+                    neighbors.append(set())
+            first, second = ids[edge[0]], ids[edge[-1]]
+            if first != second:
+                neighbors[first].add(second)
+                neighbors[second].add(first)
+        return cls(list(ids), [sorted(adjacent) for adjacent in neighbors])
+
+    @classmethod
+    def load(cls, path: str) -> "Graph":
+        """Read an edge list ("a b" per line, optionally followed by a weight,
+        which is ignored, and "a" alone for an isolated region) or adjacency
+        lines ("a: b c")."""
+        edges: list[tuple[str, ...]] = []
+        with open(path) as lines:
+            for number, line in enumerate(lines, 1):
+                line = line.split("#")[0].strip()
+                if not line:
+                    continue
+                if ":" in line:
+                    region, adjacent = line.split(":", 1)
+                    if not region.strip():
+                        raise ValueError(f"{path}:{number}: no region before ':'")
+                    edges.append((region.strip(),))  # keeps isolated regions
+                    edges.extend((region.strip(), other) for other in adjacent.split())
+                    continue
+                tokens: list[str] = line.split()
+                if len(tokens) > 3 or (len(tokens) == 3 and not _is_weight(tokens[2])):
+                    raise ValueError(
+                        f"{path}:{number}: expected 'a b' or 'a b weight', "
+                        f"got {line!r}"
+                    )
+                edges.append(tuple(tokens[:2]))
+        return cls.from_edges(edges)
+
+    def __len__(self) -> int:
+        return len(self.adjacency)
+
+    def sweep(self) -> list[int]:
+        """Breadth-first visit order of every region, highest degrees first."""
+        rank: list[int] = [-1] * len(self)
+        visited: int = 0
+        for start in sorted(range(len(self)), key=lambda v: -len(self.adjacency[v])):
+            if rank[start] >= 0:
+                continue
+            rank[start] = visited
+            visited += 1
+            queue: deque[int] = deque([start])
+            while queue:
+                for u in self.adjacency[queue.popleft()]:
+                    if rank[u] < 0:
+                        rank[u] = visited
+                        visited += 1
+                        queue.append(u)
+        return rank
+
+
+def color_graph(graph: Graph, k: int) -> Optional[list[int]]:
+    """Color the graph with k colors by DSATUR search with forward checking.
+
+    The next region is the one whose neighbors already use the most distinct
+    colors. A region left without colors jumps back to the latest colored
+    region among those responsible for it, skipping the unrelated regions
+    colored in between. colors[v] is in range(k).
+    """
+    n: int = len(graph)
+    adjacency: list[list[int]] = graph.adjacency
+    colors: list[int] = [-1] * n
+    # counts[v * k + c] neighbors of v have color c, saturation[v] colors are used
+    counts: list[int] = [0] * (n * k)
+    saturation: list[int] = [0] * n
+    # ties go to the region reached first by a breadth-first sweep, which keeps
+    # the colored regions in one compact front rather than scattered patches
+    rank: list[int] = graph.sweep()
+    # max-heap of (-saturation, rank, v) with lazy deletion of stale entries
+    heap: list[tuple[int, int, int]] = [(0, rank[v], v) for v in range(n)]
+    heap.sort()
+
+    def select() -> int:
+        if len(heap) > 4 * n:  # drop the stale entries
+            heap[:] = [(-saturation[v], rank[v], v) for v in range(n) if colors[v] < 0]
+            heapify(heap)
+        while heap:
+            negative_saturation, _, v = heappop(heap)
+            if colors[v] < 0 and -negative_saturation == saturation[v]:
+                return v
+        return -1
+
+    def assign(v: int, color: int) -> int:
+        """Color v and return a neighbor left without colors, or -1."""
+        colors[v] = color
+        wiped_out: int = -1
+        for u in adjacency[v]:
+            counts[u * k + color] += 1
+            if counts[u * k + color] == 1:
+                saturation[u] += 1
+                if colors[u] < 0:
+                    heappush(heap, (-saturation[u], rank[u], u))
+                    if saturation[u] == k:
+                        wiped_out = u
+        return wiped_out
+
+    def unassign(v: int) -> None:
+        color: int = colors[v]
+        colors[v] = -1
+        for u in adjacency[v]:
+            counts[u * k + color] -= 1
+            if counts[u * k + color] == 0:
+                saturation[u] -= 1
+                if colors[u] < 0:
+                    heappush(heap, (-saturation[u], rank[u], u))
+        heappush(heap, (-saturation[v], rank[v], v))
+
+    first: int = select()
+    if first < 0:
+        return colors
+    # frames are [region, next color to try, colors used before the region];
+    # a region never opens more than one new color, colors being symmetric
+    stack: list[list[int]] = [[first, 0, 0]]
+    # colored regions that ruled out colors of each frame's region
+    culprits: list[set[int]] = [set()]
+    depth: list[int] = [-1] * n  # stack index of every colored region
+    while stack:
+        frame: list[int] = stack[-1]
+        v, color, used = frame
+        if colors[v] >= 0:  # coming back from the previous color
+            unassign(v)
+        limit: int = min(k, used + 1)
+        while color < limit and counts[v * k + color]:
+            color += 1
+        if color < limit:
+            frame[1] = color + 1
+            wiped_out: int = assign(v, color)
+            depth[v] = len(stack) - 1
+            if wiped_out >= 0:
+                culprits[-1].update(
+                    u for u in adjacency[wiped_out] if colors[u] >= 0 and u != v
+                )
+                continue
+            following: int = select()
+            if following < 0:
+                return colors
+            stack.append([following, 0, max(used, color + 1)])
+            culprits.append(set())
+            continue
+        conflict: set[int] = culprits.pop()
+        stack.pop()
+        heappush(heap, (-saturation[v], rank[v], v))
+        if limit < k:  # colors left out by symmetry depend on every region
+            conflict.update(region for region, _, _ in stack)
+        else:
+            conflict.update(u for u in adjacency[v] if colors[u] >= 0)
+        target: int = max((depth[u] for u in conflict), default=-1)
+        while len(stack) - 1 > target:
+            unassign(stack.pop()[0])
+            culprits.pop()
+        if stack:
+            conflict.discard(stack[-1][0])
+            culprits[-1].update(conflict)
+    return None
+
+
+def greedy_clique(graph: Graph) -> int:
+    """Size of a clique grown greedily from the highest-degree regions."""
+    best: int = 1 if len(graph) else 0
+    by_degree: list[int] = sorted(
+        range(len(graph)), key=lambda v: -len(graph.adjacency[v])
+    )
+    for v in by_degree[:100]:
+        clique: list[int] = [v]
+        candidates: set[int] = set(graph.adjacency[v])
+        while candidates:
+            u: int = max(candidates, key=lambda u: len(graph.adjacency[u]))
+            clique.append(u)
+            candidates &= set(graph.adjacency[u])
+        best = max(best, len(clique))
+    return best
+
+
+def minimum_coloring(graph: Graph) -> tuple[int, list[int]]:
+    """Try k = 1, 2, ... from a clique lower bound until a coloring exists."""
+    k: int = greedy_clique(graph)
+    while True:
+        colors: Optional[list[int]] = color_graph(graph, k)
+        if colors is not None:
+            return k, colors
+        k += 1
+
+
 if __name__ == "__main__":
     import pprint
+    import sys
+    from time import perf_counter
+
+    if len(sys.argv) > 1:  # python map_coloring.py GRAPH_FILE
+        start: float = perf_counter()
+        graph: Graph = Graph.load(sys.argv[1])
+        loaded: float = perf_counter() - start
+        k, colors = minimum_coloring(graph)
+        print(
+            f"{len(graph)} regions loaded in {loaded:.2f}s, colored with {k} colors "
+            f"in {perf_counter() - start - loaded:.2f}s"
+        )
+        sys.exit()
 
     variables: list[str] = [
         "Western Australia",
@@ -45,3 +272,4 @@ if __name__ == "__main__":
         print("No solution found")
     else:
         pprint.pprint(result)
+        print(f"{csp.count_solutions()} colorings in total")
@@ -0,0 +1,226 @@
+"""Solve a CSP on a process pool by splitting the top of its search tree.
+
+Every consistent assignment of the first `depth` unassigned variables becomes
+an independent subproblem. The CSP and its constraints are pickled to the
+workers, so constraint classes must not hold lambdas or open resources.
+SolverStats passed as `stats` gathers the counts of every subproblem; its
+hooks would run in the workers, so they are refused.
+
+A Budget's deadline and cancel token cover the whole run; its node limit
+applies to every subproblem. Workers still searching when the caller stops
+consuming results are cancelled through a shared flag.
+"""
+
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from math import inf
+from time import monotonic
+from typing import Any, Iterator, Optional
+
+from csp import CSP, Budget, D, SolverStats, Status, Token, V
+
+
+def split(csp: CSP[V, D], assignment: dict[V, D], depth: int) -> Iterator[dict[V, D]]:
+    prefix: list[V] = [v for v in csp.variables if v not in assignment][:depth]
+    partial: dict[V, D] = dict(assignment)
+
+    def extend(level: int) -> Iterator[dict[V, D]]:
+        if level == len(prefix):
+            yield dict(partial)
+            return
+        variable: V = prefix[level]
+        for value in csp.domains[variable]:
+            partial[variable] = value
+            if csp.consitent(variable, partial):
+                yield from extend(level + 1)
+            del partial[variable]
+
+    yield from extend(0)
+
+
+class _Flag:
+    """A cancel token over one shared byte: workers read it without the lock
+    that multiprocessing.Event.is_set() takes, which their budgets would
+    otherwise pay on every value tried."""
+
+    def __init__(self) -> None:
+        self.value = multiprocessing.RawValue("b", 0)
+
+    def set(self) -> None:
+        self.value.value = 1
+
+    def is_set(self) -> bool:
+        return self.value.value != 0
+
+
+_csp: Optional[CSP] = None  # the problem shared by every task of a worker
+_cancel: Optional[Token] = None  # set by the parent to stop every task
+
+
+def _init_worker(csp: CSP[V, D], cancel: Token) -> None:
+    global _csp, _cancel
+    _csp = csp
+    _cancel = cancel
+
+
+def _solve(
+    subproblem: list[tuple[int, D]],
+    mode: str,
+    limit: Optional[int],
+    options: dict[str, Any],
+    deadline: float,
+    nodes: Optional[int],
+    counted: bool,
+) -> tuple[Any, Status, int, Optional[list[tuple[int, D]]], Optional[dict[str, Any]]]:
+    # variables travel as indices into csp.variables both ways: unpickled
+    # copies of the variables may not hash the same as the originals
+    assignment: dict[V, D] = {_csp.variables[i]: value for i, value in subproblem}
+    seconds: Optional[float] = None if deadline == inf else deadline - monotonic()
+    budget: Budget = Budget(seconds, nodes, _cancel)
+    if counted:
+        options = dict(options, stats=SolverStats())
+    result: Any
+    if mode == "first":
+        solution: Optional[dict[V, D]] = _csp.backtracking(
+            assignment, budget=budget, **options
+        )
+        result = None if solution is None else [solution[v] for v in _csp.variables]
+    elif mode == "all":
+        result = [
+            [solution[v] for v in _csp.variables]
+            for solution in _csp.solutions(
+                assignment, limit=limit, budget=budget, **options
+            )
+        ]
+    else:
+        result = _csp.count_solutions(assignment, limit=limit, budget=budget, **options)
+    index: dict[V, int] = {v: i for i, v in enumerate(_csp.variables)}
+    best: Optional[list[tuple[int, D]]] = (
+        None if budget.best is None else [(index[v], x) for v, x in budget.best.items()]
+    )
+    counts: Optional[dict[str, Any]] = options["stats"].as_dict() if counted else None
+    return result, budget.status, budget.spent, best, counts
+
+
+def _run(
+    csp: CSP[V, D],
+    assignment: dict[V, D],
+    mode: str,
+    depth: int,
+    max_workers: Optional[int],
+    limit: Optional[int],
+    options: dict[str, Any],
+    budget: Optional[Budget],
+) -> Iterator[Any]:
+    options = dict(options)
+    stats: Optional[SolverStats] = options.pop("stats", None)
+    if stats is not None and (
+        stats.on_assign or stats.on_backtrack or stats.on_solution
+    ):
+        raise ValueError("SolverStats hooks cannot run in the worker processes")
+    budget = budget or Budget()
+    budget.start()
+    cancel: _Flag = _Flag()
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(csp, cancel)
+    )
+    index: dict[V, int] = {v: i for i, v in enumerate(csp.variables)}
+    try:
+        pending: set[Future] = {
+            executor.submit(
+                _solve,
+                [(index[v], value) for v, value in subproblem.items()],
+                mode,
+                limit,
+                options,
+                budget.deadline,
+                budget.nodes,
+                stats is not None,
+            )
+            for subproblem in split(csp, assignment, depth)
+        }
+        while pending:
+            timeout: Optional[float] = None
+            if budget.deadline != inf:
+                timeout = max(0.0, budget.deadline - monotonic())
+            elif budget.cancel is not None:
+                timeout = 0.1  # poll the caller's token
+            done, pending = wait(pending, timeout, FIRST_COMPLETED)
+            for future in done:
+                result, status, spent, best, counts = future.result()
+                budget.spent += spent
+                if counts is not None:
+                    stats.merge(counts)
+                if status is not Status.FINISHED and budget.status is Status.FINISHED:
+                    budget.status = status
+                if best is not None:
+                    budget.reach({csp.variables[i]: value for i, value in best})
+                yield result
+            if pending and monotonic() > budget.deadline:
+                budget.status = Status.TIMED_OUT
+                return
+            if pending and budget.cancel is not None and budget.cancel.is_set():
+                budget.status = Status.CANCELLED
+                return
+    finally:
+        # queued subproblems are dropped and running ones stopped as soon as
+        # the caller stops consuming
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parallel_backtracking(
+    csp: CSP[V, D],
+    assignment: dict[V, D] = {},
+    depth: int = 2,
+    max_workers: Optional[int] = None,
+    budget: Optional[Budget] = None,
+    **options,
+) -> Optional[dict[V, D]]:
+    """Return the first solution found by any worker."""
+    for result in _run(
+        csp, assignment, "first", depth, max_workers, None, options, budget
+    ):
+        if result is not None:
+            return dict(zip(csp.variables, result))
+    return None
+
+
+def parallel_solutions(
+    csp: CSP[V, D],
+    assignment: dict[V, D] = {},
+    depth: int = 2,
+    max_workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    budget: Optional[Budget] = None,
+    **options,
+) -> Iterator[dict[V, D]]:
+    """Yield the solutions of every subproblem as the workers finish them."""
+    found: int = 0
+    for results in _run(
+        csp, assignment, "all", depth, max_workers, limit, options, budget
+    ):
+        for solution in results:
+            if limit is not None and found >= limit:
+                return
+            found += 1
+            yield dict(zip(csp.variables, solution))
+
+
+def parallel_count_solutions(
+    csp: CSP[V, D],
+    assignment: dict[V, D] = {},
+    depth: int = 2,
+    max_workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    budget: Optional[Budget] = None,
+    **options,
+) -> int:
+    total: int = 0
+    for count in _run(
+        csp, assignment, "count", depth, max_workers, limit, options, budget
+    ):
+        total += count
+        if limit is not None and total >= limit:
+            return limit
+    return total
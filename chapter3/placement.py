@@ -0,0 +1,115 @@
+"""Grid placements encoded as integer bitsets over the cells of the grid.
+
+Cell (row, column) is the bit row * columns + column, so two placements
+overlap exactly when the AND of their masks is not zero. For every distinct
+domain the index also keeps, per cell, the bitset of the placements covering
+that cell: the placements of a variable that conflict with a mask are the OR
+of the covers of the mask's cells.
+"""
+
+import sys
+from typing import Generic, Iterable, Iterator, Optional
+
+from csp import Constraint, V
+
+Location = tuple[int, int]  # (row, column), the GridLocation of the examples
+
+
+def bits(mask: int) -> Iterator[int]:
+    while mask:
+        low: int = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PlacementIndex(Generic[V]):
+    def __init__(
+        self, rows: int, columns: int, domains: dict[V, list[list[Location]]]
+    ) -> None:
+        self.rows: int = rows
+        self.columns: int = columns
+        # variables with the same placements (words of the same length, boards
+        # of the same size) share one list of masks and one cover index
+        shared: dict[tuple[int, ...], list[int]] = {}
+        self.masks: dict[V, list[int]] = {}
+        for variable, placements in domains.items():
+            masks: list[int] = [self.mask(locations) for locations in placements]
+            self.masks[variable] = shared.setdefault(tuple(masks), masks)
+        self._cells: dict[int, list[int]] = {}
+        covers: dict[int, list[int]] = {}
+        for masks in shared.values():
+            covering: list[list[int]] = [[] for _ in range(rows * columns)]
+            for idx, mask in enumerate(masks):
+                cells: list[int] = self._cells.setdefault(mask, list(bits(mask)))
+                for cell in cells:
+                    covering[cell].append(idx)
+            covers[id(masks)] = [sum(1 << i for i in idxs) for idxs in covering]
+        # kept by variable: the ids of the masks change when the index is
+        # unpickled, as in the workers of parallel.py
+        self._covers: dict[V, list[int]] = {
+            variable: covers[id(masks)] for variable, masks in self.masks.items()
+        }
+
+    def mask(self, locations: Iterable[Location]) -> int:
+        return sum(1 << (row * self.columns + column) for row, column in locations)
+
+    def locations(self, mask: int) -> list[Location]:
+        return [divmod(cell, self.columns) for cell in bits(mask)]
+
+    def conflicts(self, mask: int, variable: V) -> int:
+        """Bitset over the variable's placements that overlap the mask."""
+        cover: list[int] = self._covers[variable]
+        cells: Optional[list[int]] = self._cells.get(mask)
+        conflicting: int = 0
+        for cell in bits(mask) if cells is None else cells:
+            conflicting |= cover[cell]
+        return conflicting
+
+    def memory(self) -> int:
+        """Approximate bytes used by the masks and the cover index."""
+        distinct: dict[int, list[int]] = {id(m): m for m in self.masks.values()}
+        covers: dict[int, list[int]] = {id(c): c for c in self._covers.values()}
+        return sum(
+            sys.getsizeof(masks) + sum(map(sys.getsizeof, masks))
+            for masks in distinct.values()
+        ) + sum(
+            sys.getsizeof(cover) + sum(map(sys.getsizeof, cover))
+            for cover in covers.values()
+        )
+
+
+class PlacementConstraint(Constraint[V, int]):
+    """No two variables may share a cell; values are masks of a PlacementIndex."""
+
+    def __init__(self, index: PlacementIndex[V]) -> None:
+        super().__init__(list(index.masks))
+        self.index: PlacementIndex[V] = index
+
+    def satisfied(self, assignment: dict[V, int]) -> bool:
+        occupied: int = 0
+        for mask in assignment.values():
+            if occupied & mask:
+                return False
+            occupied |= mask
+        return True
+
+    def satisfied_delta(self, variable: V, assignment: dict[V, int]) -> bool:
+        mask: int = assignment[variable]
+        return not any(
+            other_mask & mask
+            for other, other_mask in assignment.items()
+            if other != variable
+        )
+
+    def culprits(self, variable: V, assignment: dict[V, int]) -> list[V]:
+        mask: int = assignment[variable]
+        return [
+            other
+            for other, other_mask in assignment.items()
+            if other != variable and other_mask & mask
+        ]
+
+    def pruned_values(
+        self, variable: V, assignment: dict[V, int], neighbor: V
+    ) -> Iterable[int]:
+        return bits(self.index.conflicts(assignment[variable], neighbor))
@@ -1,7 +1,7 @@
 from contextlib import suppress
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
-from csp import CSP, Constraint
+from csp import CSP, ConflictCounter, Constraint
 
 try:
     from click import style
@@ -30,6 +30,192 @@ class QueensConstraint(Constraint[int, int]):
                         return False
         return True
 
+    def satisfied_delta(self, variable: int, assignment: dict[int, int]) -> bool:
+        row: int = assignment[variable]
+        for column, other_row in assignment.items():
+            if column == variable:
+                continue
+            if other_row == row or abs(other_row - row) == abs(column - variable):
+                return False
+        return True
+
+    def counter(self, assignment: dict[int, int]) -> "QueensCounter":
+        return QueensCounter(self, assignment)
+
+    def culprits(self, variable: int, assignment: dict[int, int]) -> list[int]:
+        row: int = assignment[variable]
+        return [
+            column
+            for column, other_row in assignment.items()
+            if column != variable
+            and (other_row == row or abs(other_row - row) == abs(column - variable))
+        ]
+
+
+class QueensCounter(ConflictCounter[int, int]):
+    """Queens per row and diagonal, so min-conflicts scales to millions of them.
+
+    Each line also keeps the sum of its queens' columns, which names the
+    queen when it is alone; only crowded lines are searched for culprits.
+    """
+
+    def __init__(self, constraint: QueensConstraint, assignment: dict[int, int]):
+        super().__init__(constraint, assignment)
+        n: int = max(constraint.columns)
+        self.n: int = n
+        # queens on row r, on the diagonal r + c and the anti-diagonal r - c + n
+        self.rows: list[int] = [0] * (n + 1)
+        self.ups: list[int] = [0] * (2 * n + 1)
+        self.downs: list[int] = [0] * (2 * n + 1)
+        self.row_sums: list[int] = [0] * (n + 1)
+        self.up_sums: list[int] = [0] * (2 * n + 1)
+        self.down_sums: list[int] = [0] * (2 * n + 1)
+        # the rows without queens, and where each of them is in that list
+        self.free: list[int] = list(range(1, n + 1))
+        self.slot: list[int] = list(range(-1, n))
+        for column, row in assignment.items():
+            self.add(column, row)
+
+    def conflicts(self, variable: int, value: int) -> int:
+        return (
+            self.rows[value]
+            + self.ups[value + variable]
+            + self.downs[value - variable + self.n]
+        )
+
+    def culprits(self, variable: int, value: int) -> Iterable[int]:
+        culprits: list[int] = []
+        for counts, sums, line in (
+            (self.rows, self.row_sums, value),
+            (self.ups, self.up_sums, value + variable),
+            (self.downs, self.down_sums, value - variable + self.n),
+        ):
+            if counts[line] > 1:  # crowded line, look at every queen
+                return super().culprits(variable, value)
+            if counts[line]:
+                culprits.append(sums[line])
+        return culprits
+
+    def hints(self, variable: int) -> list[int]:
+        return self.free
+
+    def add(self, variable: int, value: int) -> None:
+        up: int = value + variable
+        down: int = value - variable + self.n
+        self.ups[up] += 1
+        self.up_sums[up] += variable
+        self.downs[down] += 1
+        self.down_sums[down] += variable
+        self.rows[value] += 1
+        self.row_sums[value] += variable
+        if self.rows[value] == 1:
+            last: int = self.free.pop()
+            if last != value:
+                self.free[self.slot[value]] = last
+                self.slot[last] = self.slot[value]
+
+    def remove(self, variable: int, value: int) -> None:
+        up: int = value + variable
+        down: int = value - variable + self.n
+        self.ups[up] -= 1
+        self.up_sums[up] -= variable
+        self.downs[down] -= 1
+        self.down_sums[down] -= variable
+        self.rows[value] -= 1
+        self.row_sums[value] -= variable
+        if self.rows[value] == 0:
+            self.slot[value] = len(self.free)
+            self.free.append(value)
+
+
+# Bitboard solver: rows are bits of an int, one queen per column. `occupied`
+# holds the rows already used, `up` and `down` the rows attacked diagonally in
+# the next column; they shift by one bit as the search moves right.
+
+
+def _symmetries(rows: list[int]) -> Iterator[tuple[int, ...]]:
+    n: int = len(rows)
+    transforms = (
+        lambda c, r: (c, r),
+        lambda c, r: (r, n - 1 - c),
+        lambda c, r: (n - 1 - c, n - 1 - r),
+        lambda c, r: (n - 1 - r, c),
+        lambda c, r: (n - 1 - c, r),
+        lambda c, r: (c, n - 1 - r),
+        lambda c, r: (r, c),
+        lambda c, r: (n - 1 - r, n - 1 - c),
+    )
+    for transform in transforms:
+        image: list[int] = [0] * n
+        for column, row in enumerate(rows):
+            new_column, new_row = transform(column, row)
+            image[new_column] = new_row
+        yield tuple(image)
+
+
+def queens_solutions(n: int, unique: bool = False) -> Iterator[dict[int, int]]:
+    """Yield every placement of n queens as {column: row}, 1-based like the CSP.
+
+    With unique=True only one solution per rotation/reflection class is yielded.
+    """
+    full: int = (1 << n) - 1
+    rows: list[int] = []
+
+    def place(occupied: int, up: int, down: int) -> Iterator[None]:
+        if occupied == full:
+            yield
+            return
+        free: int = full & ~(occupied | up | down)
+        while free:
+            bit: int = free & -free
+            free ^= bit
+            rows.append(bit.bit_length() - 1)
+            yield from place(
+                occupied | bit, ((up | bit) << 1) & full, (down | bit) >> 1
+            )
+            rows.pop()
+
+    for _ in place(0, 0, 0):
+        if unique and tuple(rows) != min(_symmetries(rows)):
+            continue
+        yield {column: row + 1 for column, row in enumerate(rows, start=1)}
+
+
+def first_queens_solution(n: int) -> Optional[dict[int, int]]:
+    return next(queens_solutions(n), None)
+
+
+def count_queens(n: int, symmetry: bool = True) -> int:
+    """Count all n-queens solutions.
+
+    With symmetry=True the first queen only visits the upper half of its
+    column and the count is doubled, mirror images being distinct solutions.
+    """
+    full: int = (1 << n) - 1
+
+    def count(occupied: int, up: int, down: int) -> int:
+        if occupied == full:
+            return 1
+        total: int = 0
+        free: int = full & ~(occupied | up | down)
+        while free:
+            bit: int = free & -free
+            free ^= bit
+            total += count(occupied | bit, ((up | bit) << 1) & full, (down | bit) >> 1)
+        return total
+
+    if not symmetry or n < 2:
+        return count(0, 0, 0)
+    total: int = 0
+    for row in range(n // 2):
+        bit: int = 1 << row
+        total += count(bit, (bit << 1) & full, bit >> 1)
+    total *= 2
+    if n % 2:
+        bit = 1 << (n // 2)
+        total += count(bit, (bit << 1) & full, bit >> 1)
+    return total
+
 
 def display_chess(result: dict[int, int]) -> None:
     grid: list[str] = [[" " for _ in range(len(result))] for _ in range(len(result))]
@@ -43,6 +229,19 @@ def display_chess(result: dict[int, int]) -> None:
 
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:  # python queens.py N uses the bitboard solver
+        n: int = int(sys.argv[1])
+        solution: Optional[dict[int, int]] = first_queens_solution(n)
+        if solution is None:
+            print("No solution found")
+        else:
+            display_chess(solution)
+            if n <= 12:
+                print(f"{count_queens(n)} solutions in total")
+        sys.exit()
+
     columns: list[int] = [1, 2, 3, 4, 5, 6, 7, 8]
     rows: dict[int, list[int]] = {col: [1, 2, 3, 4, 5, 6, 7, 8] for col in columns}
     csp: CSP[int, int] = CSP(columns, rows)
@@ -52,3 +251,4 @@ if __name__ == "__main__":
         print("No solution found")
     else:
         display_chess(result)
+        print(f"{csp.count_solutions()} solutions in total")
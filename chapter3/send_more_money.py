@@ -1,6 +1,12 @@
 from typing import Optional
+
 from csp import CSP, Constraint
 
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
 
 class SendMoreMoneyConstraint(Constraint[str, int]):
     def __init__(
@@ -19,21 +25,151 @@ class SendMoreMoneyConstraint(Constraint[str, int]):
 
         if len(assignment) == len(self.letters):
             first_sum: int = sum(
-                assignment[char] * 10 ** idx for idx, char in enumerate(reversed(first))
+                assignment[char] * 10**idx
+                for idx, char in enumerate(reversed(self.first))
             )
             second_sum: int = sum(
-                assignment[char] * 10 ** idx
-                for idx, char in enumerate(reversed(second))
+                assignment[char] * 10**idx
+                for idx, char in enumerate(reversed(self.second))
             )
             result_sum: int = sum(
-                assignment[char] * 10 ** idx
-                for idx, char in enumerate(reversed(result))
+                assignment[char] * 10**idx
+                for idx, char in enumerate(reversed(self.result))
             )
             return first_sum + second_sum == result_sum
         return True
 
+    def satisfied_delta(self, variable: str, assignment: dict[str, int]) -> bool:
+        digit: int = assignment[variable]
+        if any(d == digit for l, d in assignment.items() if l != variable):
+            return False
+        if len(assignment) == len(self.letters):
+            return self.satisfied(assignment)
+        return True
+
+
+class Cryptarithm:
+    """Addends that sum to a result word, e.g. SEND + MORE = MONEY.
+
+    Letters are ordered column by column from the rightmost one. For every
+    column k, `column_weights[k]` maps each letter to its signed weight in the
+    columns 0..k (addends count positively, the result negatively): once all
+    of them are assigned their weighted sum must be a multiple of 10 ** (k + 1),
+    whatever the carry into column k + 1 is.
+    """
+
+    def __init__(self, addends: list[str], result: str) -> None:
+        self.addends: list[str] = addends
+        self.result: str = result
+        words: list[str] = addends + [result]
+        self.letters: list[str] = []
+        self.column_ends: list[int] = []  # letters placed after each column
+        self.column_weights: list[dict[str, int]] = []
+        weights: dict[str, int] = {}
+        for column in range(max(map(len, words))):
+            for position, word in enumerate(words):
+                if column < len(word):
+                    letter: str = word[-1 - column]
+                    # by position: an addend may spell the same word as the result
+                    sign: int = -1 if position == len(addends) else 1
+                    weights[letter] = weights.get(letter, 0) + sign * 10**column
+                    if letter not in self.letters:
+                        self.letters.append(letter)
+            self.column_ends.append(len(self.letters))
+            self.column_weights.append(dict(weights))
+        self.weights: dict[str, int] = weights
+        if len(self.letters) > 10:
+            raise ValueError("A cryptarithm cannot have more than 10 letters")
+        self.leading: set[str] = {word[0] for word in words if len(word) > 1}
+
+    @classmethod
+    def parse(cls, puzzle: str) -> "Cryptarithm":
+        """Read puzzles such as 'SEND + MORE = MONEY'."""
+        left, result = puzzle.replace(" ", "").upper().split("=")
+        return cls(left.split("+"), result)
+
+    def csp(self) -> CSP[str, int]:
+        domains: dict[str, list[int]] = {
+            letter: list(range(1 if letter in self.leading else 0, 10))
+            for letter in self.letters
+        }
+        csp: CSP[str, int] = CSP(self.letters, domains)
+        csp.add_constraint(CryptarithmConstraint(self))
+        return csp
+
+    def solve(self) -> Optional[dict[str, int]]:
+        return self.csp().backtracking()
+
+    def solve_vectorized(self) -> list[dict[str, int]]:
+        """Return every solution, pruning whole batches of digit rows at once.
+
+        Rows of distinct digits are extended one letter at a time with NumPy
+        and filtered with the column check as soon as a column is complete.
+        """
+        if np is None:
+            raise ModuleNotFoundError("solve_vectorized requires numpy")
+        rows = np.zeros((1, 0), dtype=np.int64)
+        column: int = 0
+        for position, letter in enumerate(self.letters):
+            digits = np.arange(1 if letter in self.leading else 0, 10)
+            candidates = np.tile(digits, len(rows))
+            rows = np.repeat(rows, len(digits), axis=0)
+            distinct = (rows != candidates[:, None]).all(axis=1)
+            rows = np.column_stack([rows[distinct], candidates[distinct]])
+            while column < len(self.column_ends) and (
+                self.column_ends[column] == position + 1
+            ):
+                weights = np.array(
+                    [self.column_weights[column].get(l, 0) for l in self.letters]
+                )
+                partial = rows @ weights[: position + 1]
+                rows = rows[partial % 10 ** (column + 1) == 0]
+                column += 1
+        weights = np.array([self.weights[l] for l in self.letters])
+        rows = rows[rows @ weights == 0]
+        return [dict(zip(self.letters, map(int, row))) for row in rows]
+
+
+class CryptarithmConstraint(Constraint[str, int]):
+    def __init__(self, puzzle: Cryptarithm) -> None:
+        super().__init__(puzzle.letters)
+        self.puzzle: Cryptarithm = puzzle
+
+    def satisfied(self, assignment: dict[str, int]) -> bool:
+        if len(set(assignment.values())) < len(assignment):
+            return False
+        if any(assignment.get(letter) == 0 for letter in self.puzzle.leading):
+            return False
+        if len(assignment) == len(self.variables):
+            return sum(w * assignment[l] for l, w in self.puzzle.weights.items()) == 0
+        return True
+
+    def satisfied_delta(self, variable: str, assignment: dict[str, int]) -> bool:
+        digit: int = assignment[variable]
+        if digit == 0 and variable in self.puzzle.leading:
+            return False
+        if any(d == digit for l, d in assignment.items() if l != variable):
+            return False
+        # check every column whose letters are now all assigned
+        for column, weights in enumerate(self.puzzle.column_weights):
+            if any(letter not in assignment for letter in weights):
+                break
+            partial: int = sum(w * assignment[l] for l, w in weights.items())
+            if partial % 10 ** (column + 1):
+                return False
+        if len(assignment) == len(self.variables):
+            return sum(w * assignment[l] for l, w in self.puzzle.weights.items()) == 0
+        return True
+
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:  # python send_more_money.py "SEND + MORE = MONEY"
+        puzzle: Cryptarithm = Cryptarithm.parse(sys.argv[1])
+        print(puzzle.solve() or "No solution found")
+        sys.exit()
+
     first: str = "SEND"
     second: str = "MORE"
     result: str = "MONEY"
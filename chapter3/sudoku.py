@@ -1,5 +1,5 @@
 from itertools import chain
-from typing import NamedTuple, Optional
+from typing import Iterator, NamedTuple, Optional
 
 try:
     from click import style
@@ -51,6 +51,21 @@ class SudokuConstraint(Constraint):
     def __init__(self, variables: list[GridLocation], grid) -> None:
         super().__init__(variables)
         self.grid: Grid = grid
+        # the cells sharing a row, a column or a subgrid with each cell
+        self.peers: dict[GridLocation, list[GridLocation]] = {
+            gl: [
+                other
+                for other in variables
+                if other != gl
+                and (
+                    other.row == gl.row
+                    or other.column == gl.column
+                    or (other.row // 3, other.column // 3)
+                    == (gl.row // 3, gl.column // 3)
+                )
+            ]
+            for gl in variables
+        }
 
     def satisfied(self, assignment: dict[GridLocation, int]) -> bool:
         for gl, number in assignment.items():
@@ -62,6 +77,18 @@ class SudokuConstraint(Constraint):
                 return False
         return True
 
+    def satisfied_delta(
+        self, variable: GridLocation, assignment: dict[GridLocation, int]
+    ) -> bool:
+        number: int = assignment[variable]
+        return all(assignment.get(peer) != number for peer in self.peers[variable])
+
+    def culprits(
+        self, variable: GridLocation, assignment: dict[GridLocation, int]
+    ) -> list[GridLocation]:
+        number: int = assignment[variable]
+        return [peer for peer in self.peers[variable] if assignment.get(peer) == number]
+
     def used_in_row(
         self, gl: GridLocation, number: int, assignment: dict[GridLocation, int]
     ) -> bool:
@@ -94,8 +121,192 @@ class SudokuConstraint(Constraint):
         return False
 
 
+# Bitmask engine: the digit d is the bit 1 << (d - 1) and each of the 27 units
+# (rows, columns, subgrids) keeps the mask of the digits it already contains,
+# so the candidates of a cell are the digits missing from its three units.
+ALL_DIGITS: int = 0x1FF
+UNITS: list[list[int]] = (
+    [[r * 9 + c for c in range(9)] for r in range(9)]
+    + [[r * 9 + c for r in range(9)] for c in range(9)]
+    + [
+        [(br + r) * 9 + bc + c for r in range(3) for c in range(3)]
+        for br in (0, 3, 6)
+        for bc in (0, 3, 6)
+    ]
+)
+CELL_UNITS: list[tuple[int, int, int]] = [
+    (cell // 9, 9 + cell % 9, 18 + cell // 27 * 3 + cell % 9 // 3) for cell in range(81)
+]
+
+
+def parse_puzzle(line: str) -> dict[GridLocation, int]:
+    """Read the 81-character format, '.' or '0' marking the empty cells."""
+    line = line.strip()
+    if len(line) != 81:
+        raise ValueError(f"A puzzle has 81 cells, got {len(line)}")
+    givens: dict[GridLocation, int] = {}
+    for cell, char in enumerate(line):
+        if char in ".0":
+            continue
+        if not char.isdigit():
+            raise ValueError(f"Unexpected character {char!r} in puzzle")
+        givens[GridLocation(cell // 9, cell % 9)] = int(char)
+    return givens
+
+
+def _place(cells: list[int], used: list[int], cell: int, bit: int) -> None:
+    cells[cell] = bit
+    for unit in CELL_UNITS[cell]:
+        used[unit] |= bit
+
+
+def _candidates(used: list[int], cell: int) -> int:
+    row, column, box = CELL_UNITS[cell]
+    return ALL_DIGITS & ~(used[row] | used[column] | used[box])
+
+
+def _propagate(cells: list[int], used: list[int]) -> bool:
+    """Fill naked and hidden singles until nothing changes, False on a dead end."""
+    changed: bool = True
+    while changed:
+        changed = False
+        for cell, (row, column, box) in enumerate(CELL_UNITS):
+            if cells[cell]:
+                continue
+            candidates: int = ALL_DIGITS & ~(used[row] | used[column] | used[box])
+            if not candidates:
+                return False
+            if candidates & (candidates - 1) == 0:
+                _place(cells, used, cell, candidates)
+                changed = True
+        for unit_idx, unit in enumerate(UNITS):
+            missing: int = ALL_DIGITS & ~used[unit_idx]
+            while missing:
+                bit: int = missing & -missing
+                missing ^= bit
+                spot: int = -1
+                for cell in unit:
+                    if cells[cell]:
+                        continue
+                    row, column, box = CELL_UNITS[cell]
+                    if not (used[row] | used[column] | used[box]) & bit:
+                        if spot >= 0:
+                            break
+                        spot = cell
+                else:
+                    if spot < 0:
+                        return False
+                    _place(cells, used, spot, bit)
+                    changed = True
+    return True
+
+
+def solve_puzzle(givens: dict[GridLocation, int]) -> Optional[dict[GridLocation, int]]:
+    cells: list[int] = [0] * 81
+    used: list[int] = [0] * 27
+    for gl, number in givens.items():
+        cell: int = gl.row * 9 + gl.column
+        bit: int = 1 << (number - 1)
+        if cells[cell] or not _candidates(used, cell) & bit:
+            return None
+        _place(cells, used, cell, bit)
+
+    stack: list[tuple[list[int], list[int]]] = [(cells, used)]
+    while stack:
+        cells, used = stack.pop()
+        if not _propagate(cells, used):
+            continue
+        # branch on the empty cell with the fewest candidates
+        best: int = -1
+        best_candidates: int = 0
+        best_count: int = 10
+        for cell in range(81):
+            if cells[cell]:
+                continue
+            candidates: int = _candidates(used, cell)
+            count: int = candidates.bit_count()
+            if count < best_count:
+                best, best_candidates, best_count = cell, candidates, count
+                if count == 2:
+                    break
+        if best < 0:
+            return {
+                GridLocation(cell // 9, cell % 9): bit.bit_length()
+                for cell, bit in enumerate(cells)
+            }
+        bits: list[int] = [1 << d for d in range(9) if best_candidates >> d & 1]
+        for bit in reversed(bits):  # the smallest digit is tried first
+            child_cells, child_used = cells.copy(), used.copy()
+            _place(child_cells, child_used, best, bit)
+            stack.append((child_cells, child_used))
+    return None
+
+
+def solve_file(
+    path: str,
+) -> Iterator[tuple[dict[GridLocation, int], Optional[dict[GridLocation, int]]]]:
+    """Stream (givens, solution) pairs for a file with one puzzle per line."""
+    with open(path) as puzzles:
+        for line in puzzles:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            givens: dict[GridLocation, int] = parse_puzzle(line)
+            yield givens, solve_puzzle(givens)
+
+
+_checker: Optional[SudokuConstraint] = None
+
+
+def check_solution(
+    givens: dict[GridLocation, int], solution: dict[GridLocation, int]
+) -> bool:
+    """Cross-check a solution with the CSP's SudokuConstraint."""
+    global _checker
+    if _checker is None:
+        cells = [GridLocation(r, c) for r in range(9) for c in range(9)]
+        _checker = SudokuConstraint(cells, generate_sudoku())
+    return (
+        len(solution) == 81
+        and all(solution.get(gl) == number for gl, number in givens.items())
+        and all(1 <= number <= 9 for number in solution.values())
+        and _checker.satisfied(solution)
+    )
+
+
+def solution_grid(solution: dict[GridLocation, int]) -> Grid:
+    grid: Grid = generate_sudoku()
+    for gl, number in solution.items():
+        grid[gl.row][gl.column] = str(number)
+    return grid
+
+
 if __name__ == "__main__":
     import random
+    import sys
+    from time import perf_counter
+
+    if len(sys.argv) > 1:  # python sudoku.py puzzles.txt
+        solved: int = 0
+        unsolved: int = 0
+        last: Optional[dict[GridLocation, int]] = None
+        start: float = perf_counter()
+        for givens, solution in solve_file(sys.argv[1]):
+            if solution is None:
+                unsolved += 1
+                continue
+            if not check_solution(givens, solution):
+                raise AssertionError(f"Invalid solution for {givens}")
+            solved += 1
+            last = solution
+        elapsed: float = perf_counter() - start
+        if last is not None:
+            display_grid(solution_grid(last))
+        print(
+            f"{solved} solved, {unsolved} without solution in {elapsed:.2f}s "
+            f"({(solved + unsolved) / elapsed:.0f} puzzles/s)"
+        )
+        sys.exit()
 
     grid: Grid = generate_sudoku()
     variables: list[GridLocation] = [
@@ -1,6 +1,6 @@
 import random
 from string import ascii_uppercase
-from typing import NamedTuple, Optional
+from typing import Iterable, Iterator, NamedTuple, Optional
 
 try:
     from click import style
@@ -10,7 +10,8 @@ except ModuleNotFoundError:
         return text
 
 
-from csp import CSP, Constraint
+from csp import CSP, Constraint, Propagation, luby, minimum_remaining_values
+from placement import PlacementConstraint, PlacementIndex
 
 all_colors = [
     "bright_red",
@@ -47,7 +48,11 @@ def display_grid(grid: Grid) -> None:
         print("|".join(row))
 
 
-def generate_domain(word: str, grid: Grid) -> list[list[GridLocation]]:
+def generate_domain(
+    word: str, grid: Grid, match_letters: bool = False
+) -> list[list[GridLocation]]:
+    """Every line of len(word) cells; with match_letters=True only the lines
+    that already spell the word in the grid, in reading order."""
     domain: list[list[GridLocation]] = []
     height: int = len(grid)
     width: int = len(grid[0])
@@ -66,11 +71,86 @@ def generate_domain(word: str, grid: Grid) -> list[list[GridLocation]]:
                 # top to bottom
                 domain.append([GridLocation(r, col) for r in rows])
                 # diagonal towards bottom left
-                if col - length >= 0:
+                if col >= length - 1:
                     domain.append([GridLocation(r, col - (r - row)) for r in rows])
+    if match_letters:
+        return [
+            locations if forward else locations[::-1]
+            for locations in domain
+            for forward in (True, False)
+            if "".join(grid[r][c] for r, c in locations)
+            == (word if forward else word[::-1])
+        ]
     return domain
 
 
+# Word finder: a trie of the word list is walked from every cell in the eight
+# directions at once, so each cell is visited once for all the words.
+WORD_KEY: str = ""  # trie key holding the word that ends at a node
+DIRECTIONS: list[tuple[int, int]] = [
+    (0, 1),
+    (1, 1),
+    (1, 0),
+    (1, -1),
+    (0, -1),
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+]
+
+
+def build_trie(words: Iterable[str]) -> dict:
+    trie: dict = {}
+    for word in words:
+        node: dict = trie
+        for letter in word:
+            node = node.setdefault(letter, {})
+        node[WORD_KEY] = word
+    return trie
+
+
+def find_words(
+    grid: Grid, words: Iterable[str]
+) -> Iterator[tuple[str, list[GridLocation]]]:
+    """Yield (word, locations) for every occurrence of the words in the grid."""
+    trie: dict = build_trie(words)
+    # the rows are laid out in one string, each followed by a padding cell and
+    # with a padding row above and below, so that any walk across the border
+    # lands on the padding and leaves the trie
+    stride: int = len(grid[0]) + 1
+    padding: str = "\n"
+    cells: str = (
+        padding * stride
+        + "".join("".join(row) + padding for row in grid)
+        + padding * stride
+    )
+    deltas: list[int] = [dr * stride + dc for dr, dc in DIRECTIONS]
+
+    def locations(start: int, delta: int, length: int) -> list[GridLocation]:
+        return [
+            GridLocation(*divmod(start + i * delta - stride, stride))
+            for i in range(length)
+        ]
+
+    for start, letter in enumerate(cells):
+        node: Optional[dict] = trie.get(letter)
+        if node is None:
+            continue
+        if WORD_KEY in node:
+            yield node[WORD_KEY], locations(start, 0, 1)
+        for delta in deltas:
+            child: Optional[dict] = node
+            idx: int = start
+            while True:
+                idx += delta
+                child = child.get(cells[idx])
+                if child is None:
+                    break
+                if WORD_KEY in child:
+                    word: str = child[WORD_KEY]
+                    yield word, locations(start, delta, len(word))
+
+
 class WordSearchConstraint(Constraint[str, list[GridLocation]]):
     def __init__(self, words: list[str]) -> None:
         super().__init__(words)
@@ -83,8 +163,48 @@ class WordSearchConstraint(Constraint[str, list[GridLocation]]):
         ]
         return len(set(all_locations)) == len(all_locations)
 
+    def satisfied_delta(
+        self, variable: str, assignment: dict[str, list[GridLocation]]
+    ) -> bool:
+        occupied: set[GridLocation] = set(assignment[variable])
+        return all(
+            occupied.isdisjoint(locations)
+            for other, locations in assignment.items()
+            if other != variable
+        )
+
+    def culprits(
+        self, variable: str, assignment: dict[str, list[GridLocation]]
+    ) -> list[str]:
+        occupied: set[GridLocation] = set(assignment[variable])
+        return [
+            other
+            for other, locations in assignment.items()
+            if other != variable and not occupied.isdisjoint(locations)
+        ]
+
+
+def read_grid(path: str) -> Grid:
+    with open(path) as lines:
+        return [list(line.strip().upper()) for line in lines if line.strip()]
+
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2:  # python word_search.py GRID_FILE WORDS_FILE
+        grid: Grid = read_grid(sys.argv[1])
+        with open(sys.argv[2]) as lines:
+            words: list[str] = [line.strip().upper() for line in lines if line.strip()]
+        for word, locations in find_words(grid, words):
+            start, end = locations[0], locations[-1]
+            print(f"{word}: ({start.row}, {start.column}) -> ({end.row}, {end.column})")
+        sys.exit()
+
+    # python word_search.py [SEED] reproduces a run
+    seed: int = int(sys.argv[1]) if len(sys.argv) > 1 else random.randrange(2**32)
+    print(f"seed {seed}")
+    random.seed(seed)
     grid: Grid = generate_grid(9, 9)
     words: list[str] = [
         "TEHRAN",
@@ -104,14 +224,22 @@ if __name__ == "__main__":
     for w in words:
         locations[w] = generate_domain(w, grid)
 
-    csp: CSP[str, list[GridLocation]] = CSP(words, locations)
-    csp.add_constraint(WordSearchConstraint(words))
-
-    result: Optional[dict[str, list[GridLocation]]] = csp.backtracking()
+    # placements are solved as cell bitsets, see placement.py
+    index: PlacementIndex[str] = PlacementIndex(len(grid), len(grid[0]), locations)
+    csp: CSP[str, int] = CSP(words, index.masks)
+    csp.add_constraint(PlacementConstraint(index))
+
+    result: Optional[dict[str, int]] = csp.backtracking(
+        propagation=Propagation.FORWARD_CHECKING,
+        select_variable=minimum_remaining_values,
+        seed=seed,
+        restarts=luby(),
+    )
     if result is None:
         print("No solution found")
     else:
-        for color, (word, grid_locations) in zip(all_colors, result.items()):
+        for color, (word, mask) in zip(all_colors, result.items()):
+            grid_locations = [GridLocation(*loc) for loc in index.locations(mask)]
             # random reverse half time
             if random.choice([True, False]):
                 grid_locations.reverse()